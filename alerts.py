@@ -0,0 +1,135 @@
+import threading
+import time
+
+
+class AlertRule:
+    """
+    One safety condition on a reading field, with debouncing and hysteresis.
+
+    Boolean rules (no `raise_above`) trigger on a truthy value. Threshold rules
+    trigger above `raise_above` and only count as back to normal at or below
+    `clear_below`; values in between keep the current state, so a reading that
+    hovers around the threshold does not flap. The alert is raised after
+    `raise_after` consecutive triggering readings and cleared after
+    `clear_after` consecutive normal ones.
+    """
+
+    def __init__(self, name, field, raise_above=None, clear_below=None, raise_after=1, clear_after=1,
+                 severity='critical'):
+        self.name = name
+        self.field = field
+        self.raise_above = raise_above
+        self.clear_below = raise_above if clear_below is None else clear_below
+        self.raise_after = raise_after
+        self.clear_after = clear_after
+        self.severity = severity
+
+    def classify(self, value):
+        """True if `value` triggers the rule, False if it is normal, None if it says nothing."""
+        if value is None or isinstance(value, str):
+            return None
+        if self.raise_above is None:
+            return bool(value)
+        if value > self.raise_above:
+            return True
+        if value <= self.clear_below:
+            return False
+        return None
+
+
+class AlertState:
+    __slots__ = ('active', 'streak', 'since', 'value', 'last_time')
+
+    def __init__(self):
+        self.active = False
+        self.streak = 0
+        self.since = None
+        self.value = None
+        self.last_time = None
+
+
+class AlertEngine:
+    """
+    Evaluates readings against a set of AlertRules, per device.
+
+    `evaluate()` is pure in-memory work (one small state object per device and
+    rule), so it can run on every reading before anything touches the database.
+    It returns only state transitions: an alert being raised or cleared.
+    Readings that are not newer than the last one seen for a device (e.g. a
+    batch the Pi resends after a failed upload) are ignored, so a retry does
+    not count twice towards a debounce.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._lock = threading.Lock()
+        self._states = {}
+        self.evaluated = 0
+        self.transitions = 0
+
+    def evaluate(self, device_id, reading, reading_time):
+        transitions = []
+        with self._lock:
+            self.evaluated += 1
+            for rule in self.rules:
+                state = self._states.get((device_id, rule.name))
+                if state is None:
+                    state = self._states[(device_id, rule.name)] = AlertState()
+                if state.last_time is not None and reading_time <= state.last_time:
+                    continue
+                state.last_time = reading_time
+                triggered = rule.classify(reading.get(rule.field))
+                if triggered is None:
+                    continue
+                state.value = reading.get(rule.field)
+                if triggered == state.active:
+                    state.streak = 0
+                    continue
+                state.streak += 1
+                if state.streak < (rule.clear_after if state.active else rule.raise_after):
+                    continue
+                state.active = triggered
+                state.streak = 0
+                state.since = reading_time
+                transitions.append(self._describe(device_id, rule, state))
+            self.transitions += len(transitions)
+        return transitions
+
+    def restore(self, device_id, rule_name, reading_time, value):
+        """Marks an alert as active, e.g. from the last stored transition after a restart."""
+        with self._lock:
+            state = self._states.setdefault((device_id, rule_name), AlertState())
+            state.active = True
+            state.since = reading_time
+            state.value = value
+
+    def active(self, device_id=None):
+        rules = {rule.name: rule for rule in self.rules}
+        with self._lock:
+            return [
+                self._describe(device, rules[name], state)
+                for (device, name), state in self._states.items()
+                if state.active and name in rules and (device_id is None or device == device_id)
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rules": [rule.name for rule in self.rules],
+                "tracked": len(self._states),
+                "active": sum(state.active for state in self._states.values()),
+                "evaluated": self.evaluated,
+                "transitions": self.transitions,
+            }
+
+    @staticmethod
+    def _describe(device_id, rule, state):
+        return {
+            "device_id": device_id,
+            "rule": rule.name,
+            "severity": rule.severity,
+            "state": "raised" if state.active else "cleared",
+            "value": state.value,
+            "reading_time": state.since.isoformat() if state.since else None,
+            "detected_at": time.time(),
+        }
@@ -0,0 +1,99 @@
+"""
+Reading-to-alert latency benchmark.
+
+Starts the app on a local port, connects a Socket.IO client to the fleet room
+and posts readings that raise and clear the earthquake alert. For every
+transition it records the time from sending the reading to receiving the
+'alert' event, next to the time the HTTP request itself took. --db-delay and
+--model-delay slow down every SQL statement and every comfort prediction, to
+show that alerts do not wait for either.
+
+    python benchmarks/alert_latency.py --readings 200 --db-delay 50 --model-delay 200
+
+DATABASE_URL defaults to a throwaway SQLite file; point it at PostgreSQL for
+production-like numbers. The tables are created if missing.
+"""
+import argparse
+import os
+import threading
+import time
+
+import requests
+import socketio
+from sqlalchemy import event
+
+from harness import import_server, start_server, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readings', type=int, default=100, help="Alert transitions to measure (raise + clear)")
+    parser.add_argument('--db-delay', type=float, default=0.0, help="Milliseconds added to every SQL statement")
+    parser.add_argument('--model-delay', type=float, default=0.0, help="Milliseconds added to every comfort prediction")
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    server = import_server()
+    with server.app.app_context():
+        engine = server.db.engine
+    if args.db_delay:
+        event.listen(engine, 'before_cursor_execute', lambda *_: time.sleep(args.db_delay / 1000))
+    if args.model_delay:
+        predict = server.predict_and_store_comfort_batch
+
+        def slow_predict(*a, **kw):
+            time.sleep(args.model_delay / 1000)
+            return predict(*a, **kw)
+        server.predict_and_store_comfort_batch = slow_predict
+
+    base_url = start_server(server, args.port)
+
+    received = {}
+    arrived = threading.Condition()
+    client = socketio.Client()
+
+    @client.on('alert')
+    def on_alert(alerts):
+        now = time.perf_counter()
+        with arrived:
+            for alert in alerts:
+                received[(alert['rule'], alert['state'], alert['reading_time'])] = now
+            arrived.notify_all()
+
+    client.connect(base_url)
+    client.emit('subscribe', {})
+    time.sleep(0.2)
+
+    session = requests.Session()
+    reading = {
+        "device_id": "bench-alert", "temp": 25.0, "humidity": 60.0, "illuminance": 300.0, "co2": 600,
+        "noise": 40.0, "current": 0.5, "voltage": 220.0, "gas_detection": False, "earthquake": False,
+    }
+    clear_after = next(rule.clear_after for rule in server.alert_engine.rules if rule.name == 'earthquake')
+    alert_latency, http_latency = [], []
+    start = time.time()
+    for i in range(args.readings):
+        state = 'raised' if i % 2 == 0 else 'cleared'
+        # Earthquake raises on one reading and clears after `clear_after` calm ones
+        for n in range(1 if state == 'raised' else clear_after):
+            reading_time = server.datetime.fromtimestamp(start + i * 10 + n, server.timezone.utc).isoformat()
+            sent = time.perf_counter()
+            response = session.post(base_url + '/api/send/batch', timeout=30,
+                                    json=[dict(reading, earthquake=state == 'raised', time=reading_time)])
+            http_latency.append(time.perf_counter() - sent)
+            response.raise_for_status()
+        key = ('earthquake', state, reading_time)
+        with arrived:
+            if not arrived.wait_for(lambda: key in received, timeout=10):
+                print(f"No alert received for transition {i}")
+                continue
+        alert_latency.append(received[key] - sent)
+
+    client.disconnect()
+    print(f"db delay {args.db_delay} ms, model delay {args.model_delay} ms, {os.environ['DATABASE_URL'].split(':')[0]}")
+    print(summary("reading -> alert", alert_latency))
+    print(summary("HTTP request", http_latency))
+
+
+if __name__ == '__main__':
+    main()
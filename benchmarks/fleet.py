@@ -0,0 +1,48 @@
+"""
+Simulated sensor fleet.
+
+Each VirtualDevice produces readings shaped like the payload the Pi agent
+builds (raspi-code/main.py build_reading), with values from the Pi's own
+simulated sensors (raspi-code/hardware.py), so load tests exercise the same
+fields and value ranges as a real installation.
+"""
+import sys
+from datetime import datetime, timezone
+
+from harness import RASPI_DIR
+
+if RASPI_DIR not in sys.path:
+    sys.path.append(RASPI_DIR)
+from hardware import simulated_sensors
+
+# Payload fields, in the order raspi-code/main.py build_reading() writes them
+READING_FIELDS = [
+    'temp', 'humidity', 'illuminance', 'co2', 'noise', 'current', 'voltage',
+    'power', 'energy_wh', 'frequency', 'power_factor', 'gas_detection',
+]
+
+
+class VirtualDevice:
+    def __init__(self, index, seed=0, prefix='sim'):
+        self.device_id = f'{prefix}-{index:04d}'
+        # Read delays are irrelevant here; only the random walks are used
+        self.sensors = simulated_sensors(seed=seed * 100003 + index, speedup=1e9)
+        self.sent = 0
+
+    def reading(self):
+        values = {}
+        for sensor in self.sensors:
+            values.update(sensor.read())
+        self.sent += 1
+        reading = {"device_id": self.device_id}
+        reading.update({field: values.get(field) for field in READING_FIELDS})
+        reading.update({
+            "people": True,
+            "earthquake": False,
+            "time": datetime.now(timezone.utc).isoformat(),
+        })
+        return reading
+
+
+def fleet(devices, seed=0, prefix='sim'):
+    return [VirtualDevice(i, seed, prefix) for i in range(devices)]
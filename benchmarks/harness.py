@@ -0,0 +1,120 @@
+"""
+Shared helpers for the benchmark scripts: an in-process server, percentile
+summaries and SQL timing.
+
+The server runs in this process (threading async mode) so the scripts can
+hook into it. DATABASE_URL picks the database as usual and defaults to a
+throwaway SQLite file. Set it to a local PostgreSQL for production-like
+numbers.
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RASPI_DIR = os.path.join(ROOT, 'raspi-code')
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def latency_stats(values):
+    """p50/p95/p99/max in milliseconds of a list of durations in seconds."""
+    if not values:
+        return None
+    values_ms = [v * 1000 for v in values]
+    return {
+        "n": len(values_ms),
+        "p50_ms": percentile(values_ms, 50),
+        "p95_ms": percentile(values_ms, 95),
+        "p99_ms": percentile(values_ms, 99),
+        "max_ms": max(values_ms),
+    }
+
+
+def summary(name, values):
+    stats = latency_stats(values)
+    if stats is None:
+        return f"{name:<22} n=0"
+    return (f"{name:<22} n={stats['n']:<6} p50={stats['p50_ms']:8.2f} ms  p95={stats['p95_ms']:8.2f} ms  "
+            f"p99={stats['p99_ms']:8.2f} ms  max={stats['max_ms']:8.2f} ms")
+
+
+def import_server():
+    """Imports main.py with a default SQLite database and creates missing tables."""
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    os.environ['SOCKETIO_ASYNC_MODE'] = 'threading'
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import main as server
+    with server.app.app_context():
+        server.db.create_all()
+    return server
+
+
+def start_server(server, port):
+    """Serves the app on 127.0.0.1:`port` in a daemon thread; returns its base URL once it answers."""
+    import requests
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    threading.Thread(
+        target=server.socketio.run, args=(server.app,),
+        kwargs=dict(host='127.0.0.1', port=port, log_output=False, allow_unsafe_werkzeug=True),
+        daemon=True,
+    ).start()
+    base_url = f'http://127.0.0.1:{port}'
+    wait_until_up(base_url)
+    return base_url
+
+
+def wait_until_up(base_url, timeout=10):
+    import requests
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            requests.get(base_url + '/api/comfort/stats', timeout=1)
+            return
+        except requests.ConnectionError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+class SqlTimer:
+    """Sums the time spent executing SQL statements on an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.total = 0.0
+        self.statements = 0
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, *_):
+        self._started.value = time.perf_counter()
+
+    def _after(self, *_):
+        elapsed = time.perf_counter() - self._started.value
+        with self._lock:
+            self.total += elapsed
+            self.statements += 1
+
+    def reset(self):
+        with self._lock:
+            self.total = 0.0
+            self.statements = 0
+
+
+def git_commit():
+    try:
+        import subprocess
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
@@ -0,0 +1,220 @@
+"""
+Ingest and fan-out load test with a simulated sensor fleet.
+
+N virtual devices (see fleet.py) post readings at a fixed rate each, either
+one per request to /api/send or in batches to /api/send/batch, while M
+Socket.IO clients subscribe to the fleet room. Sends are scheduled open-loop:
+a device that falls behind sends immediately, and latency is also reported
+from the intended send time, so a saturated server shows up as growing
+latency instead of a quietly lower request rate.
+
+    python benchmarks/load_test.py --devices 50 --rate 1 --duration 30 --clients 10
+    python benchmarks/load_test.py --devices 200 --rate 1 --batch-size 20
+    DATABASE_URL=postgresql://... python benchmarks/load_test.py --devices 100
+
+Reported: throughput, p50/p99 ingest latency, reading-to-client latency (from
+the reading's stored time - the device time for batches, the insert time for
+/api/send - to its sensor_data emit reaching a client), and,
+when the server runs in this process, SQL time per stored reading and comfort
+inference time per prediction. The in-process server shares one interpreter
+(and its GIL) with the load generator, so for capacity numbers run serve.py
+and point --url at it; server-side numbers are then limited to
+/api/comfort/stats.
+--json writes the report to a file, e.g. to keep results of several runs.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import requests
+import socketio
+
+from fleet import fleet
+from harness import SqlTimer, git_commit, import_server, latency_stats, start_server, summary, wait_until_up
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.readings = 0
+        self.busy = 0
+        self.errors = 0
+        self.latency = []
+        self.corrected_latency = []
+        self.client_latency = []
+        self.client_frames = 0
+
+    def record(self, readings, status, latency, corrected):
+        with self._lock:
+            self.requests += 1
+            self.latency.append(latency)
+            self.corrected_latency.append(corrected)
+            if status == 201:
+                self.readings += readings
+            elif status == 503:
+                self.busy += 1
+            else:
+                self.errors += 1
+
+    def record_frame(self, latencies):
+        with self._lock:
+            self.client_frames += 1
+            self.client_latency.extend(latencies)
+
+
+def run_devices(devices, base_url, rate, batch_size, duration, results, stop):
+    """Worker thread: sends for its share of the fleet until `duration` is over."""
+    session = requests.Session()
+    interval = batch_size / rate
+    start = time.monotonic()
+    # Spread the first sends over one interval so devices do not fire in lockstep
+    due = [start + interval * i / len(devices) for i in range(len(devices))]
+    while not stop.is_set():
+        index = min(range(len(devices)), key=due.__getitem__)
+        if due[index] >= start + duration:
+            break
+        delay = due[index] - time.monotonic()
+        if delay > 0:
+            stop.wait(delay)
+        device = devices[index]
+        readings = [device.reading() for _ in range(batch_size)]
+        sent = time.monotonic()
+        try:
+            if batch_size == 1:
+                response = session.post(base_url + '/api/send', json=readings[0], timeout=30)
+            else:
+                response = session.post(base_url + '/api/send/batch', json=readings, timeout=30)
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        done = time.monotonic()
+        results.record(batch_size, status, done - sent, done - due[index])
+        due[index] += interval
+
+
+def connect_clients(base_url, count, results):
+    clients = []
+    for _ in range(count):
+        client = socketio.Client()
+
+        def on_sensor_data(data):
+            now = time.time()
+            latencies = [now - datetime.fromisoformat(row['time']).timestamp() for row in data if row.get('time')]
+            results.record_frame(latencies)
+        client.on('sensor_data', on_sensor_data)
+        client.connect(base_url)
+        client.emit('subscribe', {})
+        clients.append(client)
+    return clients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, default=20, help="Virtual devices")
+    parser.add_argument('--rate', type=float, default=1.0, help="Readings per second per device")
+    parser.add_argument('--batch-size', type=int, default=1, help="Readings per request; 1 uses /api/send")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds of load")
+    parser.add_argument('--clients', type=int, default=5, help="Socket.IO clients subscribed to the fleet room")
+    parser.add_argument('--workers', type=int, default=None, help="Sending threads (default: min(devices, 32))")
+    parser.add_argument('--url', default=None, help="Base URL of a running server instead of an in-process one")
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    server = timer = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        wait_until_up(base_url)
+    else:
+        server = import_server()
+        with server.app.app_context():
+            timer = SqlTimer(server.db.engine)
+            last_prediction = server.db.session.query(server.db.func.max(server.PeopleCount.id)).scalar() or 0
+        base_url = start_server(server, args.port)
+        server.comfort_registry.preload()
+
+    results = Results()
+    clients = connect_clients(base_url, args.clients, results)
+    devices = fleet(args.devices, args.seed)
+    workers = args.workers or min(args.devices, 32)
+    stop = threading.Event()
+    if timer:
+        timer.reset()
+    threads = [
+        threading.Thread(
+            target=run_devices,
+            args=(devices[i::workers], base_url, args.rate, args.batch_size, args.duration, results, stop),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        stop.set()
+    elapsed = time.monotonic() - started
+    time.sleep(1.0)  # let the last emits and predictions arrive
+    for client in clients:
+        client.disconnect()
+
+    report = {
+        "commit": git_commit(),
+        "database": os.environ.get('DATABASE_URL', args.url or '').split(':')[0],
+        "devices": args.devices,
+        "rate_per_device": args.rate,
+        "batch_size": args.batch_size,
+        "clients": args.clients,
+        "duration_s": elapsed,
+        "requests": results.requests,
+        "readings_stored": results.readings,
+        "busy_503": results.busy,
+        "errors": results.errors,
+        "offered_readings_per_s": args.devices * args.rate,
+        "throughput_readings_per_s": results.readings / elapsed,
+        "ingest_latency": latency_stats(results.latency),
+        "ingest_latency_from_schedule": latency_stats(results.corrected_latency),
+        "client_frames": results.client_frames,
+        "reading_to_client_latency": latency_stats(results.client_latency),
+        "comfort": requests.get(base_url + '/api/comfort/stats', timeout=10).json(),
+    }
+    if server is not None:
+        with server.app.app_context():
+            inference = server.db.session.scalars(
+                server.db.select(server.PeopleCount.inference_ms).where(server.PeopleCount.id > last_prediction)
+            ).all()
+        predictions = len(inference)
+        inference = [ms for ms in inference if ms is not None]
+        report["sql_ms_per_reading"] = timer.total * 1000 / max(results.readings, 1)
+        report["sql_statements_per_reading"] = timer.statements / max(results.readings, 1)
+        report["inference_ms_per_prediction"] = sum(inference) / len(inference) if inference else None
+        report["predictions"] = predictions
+
+    print(f"{args.devices} devices x {args.rate}/s, batch {args.batch_size}, {args.clients} clients, "
+          f"{report['database']}, {elapsed:.1f} s")
+    print(f"throughput             {report['throughput_readings_per_s']:.1f} readings/s "
+          f"(offered {report['offered_readings_per_s']:.1f}), {results.busy} busy, {results.errors} errors")
+    print(summary("ingest latency", results.latency))
+    print(summary("  from schedule", results.corrected_latency))
+    print(summary("reading -> client", results.client_latency))
+    if server is not None:
+        print(f"SQL per reading        {report['sql_ms_per_reading']:.3f} ms "
+              f"({report['sql_statements_per_reading']:.2f} statements)")
+        if report["inference_ms_per_prediction"] is not None:
+            print(f"inference              {report['inference_ms_per_prediction']:.3f} ms per prediction "
+                  f"({report['predictions']} predictions)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Micro-benchmarks of the ingest hot path, tracked over time.
+
+Times the row serializers, feature mapping, single-row forest inference,
+predict_and_store_comfort (including its INSERT), the per-reading quality
+and alert checks, and one stage mark of the /metrics instrumentation. Each
+run appends one JSON line (commit, time and the per-call cost of every
+benchmark) to a history file and compares it with the previous run there. Anything more than --threshold percent slower is
+marked REGRESSION, and the exit status is 1 if anything regressed.
+
+    python benchmarks/micro.py                 # record and compare
+    python benchmarks/micro.py --no-record     # compare only
+    python benchmarks/micro.py --only serialize
+
+The history defaults to benchmarks/results/micro.jsonl. Numbers are only
+comparable between runs on the same machine and database.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from fleet import VirtualDevice
+from harness import ROOT, git_commit, import_server
+
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'results', 'micro.jsonl')
+
+
+def measure(fn, min_time=0.5, repeat=5):
+    """Best per-call time (seconds) over `repeat` rounds of at least `min_time` each."""
+    fn()  # warm up (first-use imports, lazy loads, statement caches)
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeat:
+            break
+        calls *= 2
+    best = elapsed / calls
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def benchmarks(server):
+    """name -> zero-argument callable; runs inside an app context."""
+    device = VirtualDevice(0, prefix='micro')
+    reading = device.reading()
+    sensor = server.SensorData(
+        id=1, time=datetime.now(timezone.utc),
+        **{key: value for key, value in reading.items() if hasattr(server.SensorData, key) and key != 'time'},
+    )
+    count = server.PeopleCount(id=1, jumlah_orang=True, device_id=device.device_id, model_version='bench',
+                               comfort_probability=0.8, sensor_data_id=1, time=datetime.now(timezone.utc))
+    features = server.comfort_features(reading)
+    comfort_model = server.comfort_registry.current()
+    from inference import feature_matrix
+    matrix = feature_matrix([features])
+    readings = [device.reading() for _ in range(1000)]
+    position = [0]
+    clock = server.StageTimer('bench_stage_seconds', "Benchmark only.").start()
+
+    def next_reading():
+        position[0] = (position[0] + 1) % len(readings)
+        return dict(readings[position[0]])
+
+    def alert_check():
+        # A fresh reading time each call, or the engine would skip it as already seen
+        server.alert_engine.evaluate(device.device_id, next_reading(), datetime.now(timezone.utc))
+
+    return {
+        "serialize_sensor": lambda: server.serialize_sensor(sensor),
+        "serialize_people_count": lambda: server.serialize_people_count(count),
+        "comfort_features": lambda: server.comfort_features(reading),
+        "forest_predict_one": lambda: comfort_model.predict_proba(matrix),
+        "predict_and_store_comfort": lambda: server.predict_and_store_comfort(dict(features, device_id=device.device_id)),
+        "quality_screen": lambda: server.screen_reading(device.device_id, next_reading()),
+        "alert_check": alert_check,
+        "stage_timer_mark": lambda: clock.mark('bench'),
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    parser.add_argument('--no-record', action='store_true', help="Do not append this run to the history")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Percent slowdown reported as a regression")
+    parser.add_argument('--min-time', type=float, default=0.5, help="Seconds spent per benchmark")
+    parser.add_argument('--only', default=None, help="Run benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    server = import_server()
+    with server.app.app_context():
+        server.comfort_registry.preload()
+        results = {}
+        for name, fn in benchmarks(server).items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = measure(fn, args.min_time) * 1e6
+
+    history = load_history(args.history)
+    previous = history[-1]["results_us"] if history else {}
+    regressed = []
+    print(f"{'benchmark':<28}{'us/call':>12}{'previous':>12}{'change':>10}")
+    for name, value in results.items():
+        line = f"{name:<28}{value:12.2f}"
+        if name in previous:
+            change = (value / previous[name] - 1) * 100
+            line += f"{previous[name]:12.2f}{change:+9.1f}%"
+            if change > args.threshold:
+                line += "  REGRESSION"
+                regressed.append(name)
+        print(line)
+
+    if not args.no_record:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, 'a') as f:
+            f.write(json.dumps({
+                "time": datetime.now(timezone.utc).isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "database": os.environ['DATABASE_URL'].split(':')[0],
+                "results_us": results,
+            }) + '\n')
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
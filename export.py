@@ -0,0 +1,172 @@
+import csv
+import io
+from datetime import datetime
+
+from sqlalchemy import types
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow and Parquet exports need pyarrow; CSV works without it
+    pa = None
+    pa_csv = None
+    pq = None
+
+# Export format -> response mimetype
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class ByteSink(io.RawIOBase):
+    """
+    Write-only file object that hands its bytes out in pieces.
+
+    Writers append to it and `drain()` returns (and forgets) everything written
+    since the last call, so a response can be streamed while it is produced.
+    `tell()` keeps counting across drains, which the Parquet writer relies on
+    for its column chunk offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+class BlockReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte blocks, e.g. the output of COPY."""
+
+    def __init__(self, blocks):
+        super().__init__()
+        self._blocks = iter(blocks)
+        self._pending = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._pending = memoryview(block)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def require_pyarrow(fmt):
+    if pa is None:
+        raise RuntimeError(f"The '{fmt}' export format needs pyarrow (pip install pyarrow)")
+
+
+def arrow_type(column_type):
+    """Arrow type for a SQLAlchemy column type; Numeric stays decimal instead of becoming float."""
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.BigInteger):
+        return pa.int64()
+    if isinstance(column_type, types.Integer):
+        return pa.int32()
+    if isinstance(column_type, types.Float):
+        return pa.float32() if isinstance(column_type, types.REAL) else pa.float64()
+    if isinstance(column_type, types.Numeric):
+        return pa.decimal128(column_type.precision, column_type.scale)
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp('us', tz='UTC' if column_type.timezone else None)
+    return pa.string()
+
+
+def arrow_schema(columns):
+    return pa.schema([pa.field(column.name, arrow_type(column.type)) for column in columns])
+
+
+def record_batches(schema, chunks):
+    """Converts chunks of database rows into record batches of `schema`."""
+    for rows in chunks:
+        values = list(zip(*rows)) if rows else [[] for _ in schema]
+        arrays = [pa.array(column, type=field.type) for column, field in zip(values, schema)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def csv_record_batches(schema, blocks):
+    """
+    Parses CSV with a header line (as written by PostgreSQL's COPY) into record
+    batches of `schema`. Arrow's C parser is much faster than building Python
+    objects row by row.
+    """
+    reader = pa_csv.open_csv(
+        BlockReader(blocks),
+        read_options=pa_csv.ReadOptions(block_size=4 << 20),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={field.name: field.type for field in schema},
+            include_columns=schema.names,
+            true_values=['t', 'True'],
+            false_values=['f', 'False'],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    for batch in reader:
+        yield batch
+
+
+def csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_chunks(names, chunks):
+    """Yields CSV bytes: a header line, then one block per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        writer.writerows([[csv_value(value) for value in row] for row in rows])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def arrow_chunks(schema, batches):
+    """Yields an Arrow IPC stream, written one record batch at a time."""
+    sink = ByteSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def parquet_chunks(schema, batches):
+    """Yields a Parquet file, one row group per record batch; the footer comes last."""
+    sink = ByteSink()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
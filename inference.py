@@ -0,0 +1,402 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import joblib
+import numpy as np
+
+# Class label the model uses for 'nyaman' (comfortable)
+COMFORT_CLASS = 0
+
+# Define the features your model was trained on, IN THE CORRECT ORDER
+MODEL_FEATURES = ['temperatur', 'kelembaban', 'kadar_co2', 'kebocoran_gas', 'intensitas_cahaya', 'energy_consumption']
+
+# File names inside a versioned model directory written by training.py
+MODEL_FILE = 'model.joblib'
+SCALER_FILE = 'scaler.joblib'
+METADATA_FILE = 'metadata.json'
+# Packed forest arrays (see pack_forest), saved as <FOREST_PREFIX><name>.npy
+FOREST_PREFIX = 'forest_'
+FOREST_ARRAYS = ['classes', 'mean', 'scale', 'roots', 'children', 'feature', 'threshold', 'value', 'depth']
+# File under the model root naming the version every server process should serve
+CURRENT_FILE = 'CURRENT'
+
+
+def comfort_features(data: dict):
+    """
+    Maps a sensor reading onto the comfort model's feature names. Used both at
+    ingest and by training.py, so served and trained models see the same inputs.
+    """
+    return {
+        'temperatur': data.get('temp'), # Map 'temp' from sensor data to 'temperatur' for model
+        'kelembaban': data.get('humidity'), # Map 'humidity' to 'kelembaban'
+        'kadar_co2': data.get('co2'), # Map 'co2' to 'kadar_co2'
+        'kebocoran_gas': data.get('gas_detection'), # Map 'gas_detection' to 'kebocoran_gas'
+        'intensitas_cahaya': data.get('illuminance'), # Map 'illuminance' to 'intensitas_cahaya'
+        'energy_consumption': data.get('current') * data.get('voltage', 0) # Example: Calculate energy from current and voltage
+    }
+
+
+def feature_matrix(rows, features=MODEL_FEATURES):
+    """Builds a contiguous float64 matrix from feature dicts, in `features` order; None becomes NaN."""
+    matrix = np.array(
+        [[np.nan if row[f] is None else row[f] for f in features] for row in rows],
+        dtype=np.float64,
+    )
+    return np.ascontiguousarray(matrix.reshape(len(rows), len(features)))
+
+
+def load_artifacts(directory):
+    """
+    Loads (model, scaler, metadata) from a model directory written by training.py.
+    The joblib files are uncompressed, so their NumPy arrays are memory-mapped
+    rather than read and copied.
+    """
+    model = joblib.load(os.path.join(directory, MODEL_FILE), mmap_mode='r')
+    scaler = joblib.load(os.path.join(directory, SCALER_FILE), mmap_mode='r')
+    return model, scaler, read_metadata(directory)
+
+
+def read_metadata(directory):
+    with open(os.path.join(directory, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if metadata.get('features') != MODEL_FEATURES:
+        raise ValueError(f"{directory} was trained on features {metadata.get('features')}, expected {MODEL_FEATURES}")
+    return metadata
+
+
+def pack_forest(model, scaler):
+    """
+    Flattens a fitted tree ensemble and its StandardScaler into plain NumPy
+    arrays, so inference needs neither sklearn nor its unpickled objects.
+    All trees share one node table; `children[2 * node]` is the left child and
+    `children[2 * node + 1]` the right one. Leaves point back to themselves, so
+    every row can take exactly `depth` steps. `value` holds class fractions per node.
+    """
+    if type(scaler).__name__ != 'StandardScaler' or not hasattr(model, 'estimators_'):
+        raise ValueError(f"Cannot pack {type(model).__name__} with {type(scaler).__name__}")
+    roots, children, feature, threshold, value = [], [], [], [], []
+    offset = 0
+    depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        ids = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        roots.append(offset)
+        left = np.where(leaf, ids, tree.children_left)
+        right = np.where(leaf, ids, tree.children_right)
+        children.append(np.column_stack([left, right]).ravel() + offset)
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        node_value = tree.value[:, 0, :]
+        value.append(node_value / node_value.sum(axis=1, keepdims=True))
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+
+    n_features = len(scaler.scale_ if scaler.scale_ is not None else scaler.mean_)
+    return {
+        'classes': np.asarray(model.classes_),
+        'mean': np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(n_features), dtype=np.float64),
+        'scale': np.asarray(scaler.scale_ if scaler.with_std else np.ones(n_features), dtype=np.float64),
+        'roots': np.array(roots, dtype=np.int64),
+        'children': np.concatenate(children).astype(np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'value': np.concatenate(value).astype(np.float64),
+        'depth': np.array(depth, dtype=np.int64),
+    }
+
+
+def save_forest(directory, forest):
+    for name, array in forest.items():
+        np.save(os.path.join(directory, f'{FOREST_PREFIX}{name}.npy'), array)
+
+
+def load_forest(directory):
+    """Memory-maps the arrays written by save_forest(); processes loading the same version share their pages."""
+    return {
+        name: np.load(os.path.join(directory, f'{FOREST_PREFIX}{name}.npy'), mmap_mode='r')
+        for name in FOREST_ARRAYS
+    }
+
+
+def load_version(directory, features=MODEL_FEATURES):
+    """ComfortModel for a model directory; versions saved without packed arrays are packed on load."""
+    metadata = read_metadata(directory)
+    if os.path.exists(os.path.join(directory, f'{FOREST_PREFIX}roots.npy')):
+        forest = load_forest(directory)
+    else:
+        model, scaler, _ = load_artifacts(directory)
+        forest = pack_forest(model, scaler)
+    return ComfortModel(forest, features, version=metadata['version'])
+
+
+class ComfortModel:
+    """
+    Runs comfort inference for one model version on plain NumPy feature
+    matrices, from the arrays built by pack_forest().
+    """
+
+    def __init__(self, forest, features, version=None):
+        self.features = list(features)
+        self.version = version
+        self.classes = np.asarray(forest['classes'])
+        self.comfort_index = int(np.flatnonzero(self.classes == COMFORT_CLASS)[0])
+        self._mean = forest['mean']
+        self._scale = forest['scale']
+        self._roots = np.asarray(forest['roots'])
+        self._children = forest['children']
+        self._feature = forest['feature']
+        self._threshold = forest['threshold']
+        self._value = forest['value']
+        self._depth = int(forest['depth'])
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, features, version=None):
+        return cls(pack_forest(model, scaler), features, version)
+
+    def feature_matrix(self, rows):
+        """Builds a contiguous float64 matrix from feature dicts, in self.features order."""
+        return feature_matrix(rows, self.features)
+
+    def transform(self, X):
+        return (X - self._mean) / self._scale
+
+    def predict_proba(self, X):
+        """Class probabilities for a (n_samples, n_features) matrix, from one forest pass."""
+        X = np.asarray(X, dtype=np.float64)
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN")
+
+        # Same float32 comparison as sklearn's trees; every tree advances one
+        # level per step, with flat take() indexing into the row-major matrix
+        X32 = np.ascontiguousarray(self.transform(X), dtype=np.float32)
+        values = X32.ravel()
+        row_offsets = np.arange(len(X32))[:, None] * X32.shape[1]
+        node = np.tile(self._roots, (len(X32), 1))
+        for _ in range(self._depth):
+            go_right = values.take(row_offsets + self._feature.take(node)) > self._threshold.take(node)
+            node = self._children.take(node * 2 + go_right)
+        return self._value.take(node, axis=0).mean(axis=1)
+
+    def predict(self, X):
+        """
+        Returns (comfortable, probabilities): a boolean array that is True where the
+        most probable class is COMFORT_CLASS, and the full probability matrix.
+        """
+        probs = self.predict_proba(X)
+        comfortable = self.classes[probs.argmax(axis=1)] == COMFORT_CLASS
+        return comfortable, probs
+
+
+class ModelRegistry:
+    """
+    Serves the active ComfortModel and swaps it for another version without a restart.
+
+    Versions are directories under `root` written by training.py. The active
+    one is named in `root/CURRENT`, falling back to `default_dir` and then to
+    the legacy `model_path`/`scaler_path` pickles. Nothing is loaded before the
+    first prediction or `preload()`. A swap loads the new version completely
+    before replacing the reference, so requests already running finish on the
+    model they started with.
+    """
+
+    def __init__(self, root, features=MODEL_FEATURES, default_dir=None, model_path=None, scaler_path=None):
+        self.root = root
+        self.features = list(features)
+        self.default_dir = default_dir
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self._lock = threading.Lock()
+        self._model = None
+        self._directory = None
+
+    def active_directory(self):
+        """Directory of the version that should be served, or None for the legacy pickles."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            version = None
+        return os.path.join(self.root, version) if version else self.default_dir
+
+    def load(self, directory):
+        if directory is not None:
+            comfort_model = load_version(directory, self.features)
+        else:
+            comfort_model = ComfortModel.from_sklearn(
+                joblib.load(self.model_path), joblib.load(self.scaler_path), self.features,
+                version=os.path.splitext(os.path.basename(self.model_path))[0],
+            )
+        print(f"Comfort model {comfort_model.version} loaded")
+        return comfort_model
+
+    def loaded(self):
+        """The model being served, or None if nothing has been loaded yet."""
+        return self._model
+
+    def current(self):
+        """The model being served, loading it on first use."""
+        comfort_model = self._model
+        if comfort_model is None:
+            with self._lock:
+                if self._model is None:
+                    directory = self.active_directory()
+                    self._model = self.load(directory)
+                    self._directory = directory
+                comfort_model = self._model
+        return comfort_model
+
+    def preload(self):
+        """Loads the active model in the background so startup does not wait for it."""
+        threading.Thread(target=self.current, name='model-preload', daemon=True).start()
+
+    def version_directory(self, version):
+        if not version or os.path.basename(version) != version or version.startswith('.'):
+            raise ValueError(f"Invalid model version: {version!r}")
+        directory = os.path.join(self.root, version)
+        if not os.path.exists(os.path.join(directory, METADATA_FILE)):
+            raise FileNotFoundError(f"Unknown model version: {version}")
+        return directory
+
+    def activate(self, version):
+        """
+        Makes `version` active for every process sharing `root` and swaps this
+        process over; the others follow on refresh(). Nothing changes if the
+        version fails to load.
+        """
+        directory = self.version_directory(version)
+        comfort_model = self.load(directory)
+        # Replace the pointer atomically so no process reads a partial name
+        pointer = os.path.join(self.root, CURRENT_FILE)
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(version)
+        os.replace(pointer + '.tmp', pointer)
+        with self._lock:
+            self._model = comfort_model
+            self._directory = directory
+        return comfort_model
+
+    def refresh(self):
+        """Swaps to the active version if it is not the one loaded; returns True if it swapped."""
+        directory = self.active_directory()
+        if self._model is None or directory == self._directory:
+            return False
+        comfort_model = self.load(directory)
+        with self._lock:
+            self._model = comfort_model
+            self._directory = directory
+        return True
+
+    def watch(self, interval, sleep=time.sleep):
+        """Calls refresh() every `interval` seconds; run as a background task."""
+        while True:
+            sleep(interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Model refresh failed: {e}")
+
+    def versions(self):
+        """Metadata of every version under `root`, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        versions = []
+        for name in sorted(os.listdir(self.root)):
+            try:
+                versions.append(read_metadata(self.version_directory(name)))
+            except (OSError, ValueError):
+                continue
+        return versions
+
+
+def run_directly(func, *args):
+    return func(*args)
+
+
+def native_thread_runner(async_mode):
+    """
+    Returns a function calling func(*args) where CPU-bound work (a forest
+    pass) cannot stall the server. Under gevent or eventlet the "threads" of
+    the comfort workers are greenlets sharing one OS thread with the event
+    loop, so the call is handed to the library's pool of real OS threads;
+    with plain threads it runs in the caller.
+    """
+    if async_mode == 'gevent':
+        import gevent
+        return lambda func, *args: gevent.get_hub().threadpool.apply(func, args)
+    if async_mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute
+    return run_directly
+
+
+class MicroBatcher:
+    """
+    Collects single-reading inference requests from concurrent callers and runs
+    them through the model together.
+
+    A worker thread waits for the first request, then gathers whatever else
+    arrives within `max_wait` seconds (up to `max_batch` rows) and answers all
+    of them from one predict_proba call on the model `get_model()` returns.
+    Each caller gets its share of that call's time: the call's milliseconds
+    divided by the rows it predicted. The call itself goes through `run`
+    (see native_thread_runner).
+    """
+
+    def __init__(self, get_model, max_batch=64, max_wait=0.002, run=run_directly):
+        self.get_model = get_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.run = run
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='comfort-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, features):
+        """Queues one feature dict; the Future resolves to (comfort_model, probability row, inference ms)."""
+        future = Future()
+        self._requests.put((features, future))
+        return future
+
+    def predict_one(self, features):
+        return self.submit(features).result()
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._requests.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+
+            try:
+                comfort_model = self.get_model()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            try:
+                started = time.perf_counter()
+                X = comfort_model.feature_matrix([features for features, _ in batch])
+                probs = self.run(comfort_model.predict_proba, X)
+                inference_ms = (time.perf_counter() - started) * 1000 / len(batch)
+            except Exception:
+                # Fall back to one row at a time so a bad reading fails alone
+                for features, future in batch:
+                    try:
+                        started = time.perf_counter()
+                        X = comfort_model.feature_matrix([features])
+                        prob = self.run(comfort_model.predict_proba, X)[0]
+                        future.set_result((comfort_model, prob, (time.perf_counter() - started) * 1000))
+                    except Exception as row_error:
+                        future.set_exception(row_error)
+                continue
+
+            for (_, future), prob in zip(batch, probs):
+                future.set_result((comfort_model, prob, inference_ms))
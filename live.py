@@ -0,0 +1,189 @@
+import threading
+import time
+
+
+class LatestCache:
+    """
+    Thread-safe latest-value store keyed by (event, device).
+
+    Each entry keeps an ordering key (normally the row's (time, id)), so an
+    update that was committed earlier but arrives later never overwrites a
+    newer value, and the time it was last confirmed, so readers can treat
+    entries older than some age as unknown and re-read the source (rows
+    committed by other server processes never reach this cache directly).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def update(self, event, payload, order_key, device=None):
+        """
+        Stores `payload` if it is not older than the cached one; returns True
+        if it was stored. An older payload still confirms the cached entry as
+        current, since the caller just saw something newer exists.
+        """
+        now = time.monotonic()
+        with self._lock:
+            current = self._entries.get((event, device))
+            if current is not None and current[0] > order_key:
+                self._entries[(event, device)] = (current[0], current[1], now)
+                return False
+            self._entries[(event, device)] = (order_key, payload, now)
+            return True
+
+    def get(self, event, device=None, max_age=None):
+        """The cached payload, or None if there is none or it was confirmed more than `max_age` seconds ago."""
+        with self._lock:
+            entry = self._entries.get((event, device))
+        if entry is None or (max_age is not None and time.monotonic() - entry[2] > max_age):
+            return None
+        return entry[1]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+
+class EmitCoalescer:
+    """
+    Rate-limits Socket.IO emits to at most `max_per_second` per (event, room, source).
+
+    A publish inside the quiet interval only replaces the pending payload; a
+    single deferred emit then sends whatever is newest once the interval is
+    over, so bursts collapse into one frame and no final value is lost.
+    `source` (e.g. the device) keeps streams that share a room from
+    overwriting each other's pending payload.
+
+    The deferred emit runs as a background task. If that task never runs
+    (e.g. it was started from an OS thread the async framework's hub does
+    not serve, or starting it failed), the next publish after the pending
+    payload is overdue by more than `stall_after` seconds sends directly, so
+    a stream can never stay stuck behind a lost flush.
+    """
+
+    def __init__(self, emit, start_background_task, sleep, max_per_second=5, stall_after=2.0):
+        self._emit = emit
+        self._start_background_task = start_background_task
+        self._sleep = sleep
+        self.interval = 1.0 / max_per_second
+        self.stall_after = stall_after
+        self._lock = threading.Lock()
+        self._last_emit = {}
+        # key -> (payload, time it is due to be sent)
+        self._pending = {}
+        self.emitted = 0
+        self.coalesced = 0
+        self.stalled = 0
+
+    def publish(self, event, payload, room=None, source=None):
+        key = (event, room, source)
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and now < pending[1] + self.stall_after:
+                self._pending[key] = (payload, pending[1])
+                self.coalesced += 1
+                return
+            if pending is not None:
+                # The deferred emit for this key never ran; take over from it
+                del self._pending[key]
+                self.stalled += 1
+                wait = 0
+            else:
+                wait = self._last_emit.get(key, float('-inf')) + self.interval - now
+            if wait > 0:
+                self._pending[key] = (payload, now + wait)
+            else:
+                self._last_emit[key] = now
+                self.emitted += 1
+        if wait <= 0:
+            self._emit(event, payload, room)
+            return
+        try:
+            self._start_background_task(self._flush_later, key, wait)
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+
+    def _flush_later(self, key, wait):
+        self._sleep(wait)
+        with self._lock:
+            pending = self._pending.pop(key, None)
+            if pending is None:
+                return  # already sent by a publish that found it overdue
+            self._last_emit[key] = time.monotonic()
+            self.emitted += 1
+        self._emit(key[0], pending[0], key[1])
+
+
+class DeltaEncoder:
+    """
+    Compact live frames: every (event, room, device) stream sends only the
+    fields that changed since its previous frame, with field names replaced
+    by their index in `fields`, plus a full keyframe every `keyframe_every`
+    frames or `keyframe_seconds` seconds.
+
+    A frame is `pack([event index, keyframe, base, device id, {field index: value}])`
+    where `base` is the row id (`id_field`) of the frame a delta applies to
+    (None for keyframes). Row ids come from the database, so a client can
+    check a delta against the state it holds whichever server process built
+    either of them, and asks for a keyframe when they do not match.
+    """
+
+    def __init__(self, events, fields, pack, keyframe_every=30, keyframe_seconds=30.0, id_field='id'):
+        self.events = {event: index for index, event in enumerate(events)}
+        self.fields = {field: index for index, field in enumerate(fields)}
+        self._id = self.fields[id_field]
+        self._pack = pack
+        self.keyframe_every = keyframe_every
+        self.keyframe_seconds = keyframe_seconds
+        self._lock = threading.Lock()
+        # (event, room, device) -> [{field index: value}, frames since keyframe, keyframe time]
+        self._streams = {}
+        self.frames = 0
+        self.keyframes = 0
+        self.bytes = 0
+
+    def _values(self, row):
+        return {self.fields[field]: value for field, value in row.items() if field in self.fields}
+
+    def _frame(self, event, base, device_id, values):
+        frame = self._pack([self.events[event], base is None, base, device_id, values])
+        self.frames += 1
+        self.keyframes += base is None
+        self.bytes += len(frame)
+        return frame
+
+    def encode(self, event, room, row):
+        """The next frame of the stream `row` belongs to."""
+        values = self._values(row)
+        key = (event, room, row.get('device_id'))
+        now = time.monotonic()
+        with self._lock:
+            state = self._streams.get(key)
+            if (state is None or state[1] + 1 >= self.keyframe_every
+                    or now - state[2] >= self.keyframe_seconds):
+                self._streams[key] = [values, 0, now]
+                return self._frame(event, None, key[2], values)
+            previous = state[0]
+            changes = {index: value for index, value in values.items()
+                       if index not in previous or previous[index] != value}
+            state[0] = values
+            state[1] += 1
+            return self._frame(event, previous.get(self._id), key[2], changes)
+
+    def keyframe(self, event, device_id, row):
+        """A full frame of `row`, for a client that joins or lost track of a stream."""
+        with self._lock:
+            return self._frame(event, None, device_id, self._values(row))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "streams": len(self._streams),
+                "frames": self.frames,
+                "keyframes": self.keyframes,
+                "bytes": self.bytes,
+            }
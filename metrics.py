@@ -0,0 +1,249 @@
+import bisect
+import cProfile
+import io
+import math
+import pstats
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def format_value(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def exposition(name, kind, help_text, samples):
+    """
+    One metric family in the Prometheus text format. `samples` is a list of
+    (labels dict, value) pairs, or (suffix, labels dict, value) for histograms.
+    """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for sample in samples:
+        suffix, labels, value = sample if len(sample) == 3 else ('', *sample)
+        lines.append(f'{name}{suffix}{format_labels(labels)} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and a few additions under a lock."""
+    __slots__ = ('buckets', '_counts', '_sum', '_lock')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def samples(self, labels):
+        """Cumulative (suffix, labels, value) samples as Prometheus expects them."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            samples.append(('_bucket', dict(labels, le=format_value(float(bound))), cumulative))
+        samples.append(('_sum', labels, total))
+        samples.append(('_count', labels, cumulative))
+        return samples
+
+
+class StageTimer:
+    """
+    Latency histograms for the consecutive stages of one code path, labelled
+    by stage (and the path's own labels, e.g. the route).
+
+    `start()` returns a clock; each `clock.mark(stage)` records the time since
+    the previous mark (or the start) under that stage, so a handler is timed
+    with one perf_counter() call per stage boundary.
+    """
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, **labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        return StageClock(self)
+
+    def observe(self, stage, seconds):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        histogram.observe(seconds)
+
+    def samples(self):
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        samples = []
+        for stage, histogram in histograms:
+            samples.extend(histogram.samples(dict(self.labels, stage=stage)))
+        return samples
+
+
+class StageClock:
+    __slots__ = ('timer', 'last')
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.timer.observe(stage, now - self.last)
+        self.last = now
+
+
+def render_stage_timers(timers):
+    """Timers sharing a metric name are rendered as one family."""
+    families = {}
+    for timer in timers:
+        families.setdefault(timer.name, (timer.help_text, []))[1].extend(timer.samples())
+    return ''.join(exposition(name, 'histogram', help_text, samples)
+                   for name, (help_text, samples) in families.items())
+
+
+class RateMeter:
+    """
+    Event counter with a per-second rate averaged exponentially over about
+    `window` seconds (like a load average): constant memory and no timer
+    thread, the decay is applied whenever the meter is touched.
+    """
+    __slots__ = ('window', 'total', '_value', '_updated', '_lock')
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self.total = 0
+        self._value = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decay(self, now):
+        self._value *= math.exp(-(now - self._updated) / self.window)
+        self._updated = now
+
+    def add(self, count=1):
+        with self._lock:
+            self._decay(time.monotonic())
+            self._value += count / self.window
+            self.total += count
+
+    def rate(self):
+        with self._lock:
+            self._decay(time.monotonic())
+            return self._value
+
+
+class DeviceActivity:
+    """Per-device reading counts, ingest rates and last-seen (wall clock) times."""
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self._devices = {}
+
+    def seen(self, device_id, count=1):
+        entry = self._devices.get(device_id)
+        if entry is None:
+            with self._lock:
+                entry = self._devices.setdefault(device_id, [RateMeter(self.window), 0.0])
+        entry[0].add(count)
+        entry[1] = time.time()
+
+    def snapshot(self):
+        """device id -> (readings total, readings per second, last seen epoch seconds)."""
+        with self._lock:
+            devices = list(self._devices.items())
+        return {device_id: (meter.total, meter.rate(), last_seen) for device_id, (meter, last_seen) in devices}
+
+
+class ProfileSampler:
+    """
+    Runtime-switchable sampled profiling: while enabled, one in `sample_every`
+    calls of `start()` returns a running cProfile.Profile (the others return
+    None at the cost of a counter increment), and `stop()` folds it into the
+    accumulated statistics shown by `report()`.
+    """
+
+    def __init__(self, sample_every=100):
+        self.enabled = False
+        self.sample_every = sample_every
+        self.sampled = 0
+        self._calls = 0
+        self._stats = None
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=None, sample_every=None, reset=False):
+        with self._lock:
+            if sample_every is not None:
+                if int(sample_every) < 1:
+                    raise ValueError("sample_every must be at least 1")
+                self.sample_every = int(sample_every)
+            if enabled is not None:
+                self.enabled = bool(enabled)
+            if reset:
+                self._stats = None
+                self.sampled = 0
+
+    def start(self):
+        if not self.enabled:
+            return None
+        self._calls += 1  # An occasional lost increment only shifts which call is sampled
+        if self._calls % self.sample_every:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None  # another profiler is already active on this thread
+        return profiler
+
+    def stop(self, profiler):
+        if profiler is None:
+            return
+        profiler.disable()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+            self.sampled += 1
+
+    def report(self, sort='cumulative', limit=40):
+        with self._lock:
+            if self._stats is None:
+                return f"No samples (enabled={self.enabled}, sample_every={self.sample_every})\n"
+            out = io.StringIO()
+            self._stats.stream = out
+            out.write(f"{self.sampled} sampled calls (1 in {self.sample_every})\n")
+            self._stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+    def state(self):
+        return {"enabled": self.enabled, "sample_every": self.sample_every, "sampled": self.sampled}
@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+
+
+class PredictionPipeline:
+    """
+    Bounded background queue feeding a small pool of worker threads.
+
+    Producers call `submit()` and return immediately; each worker takes the
+    oldest item plus whatever else is already waiting (up to `max_batch`) and
+    hands the payloads to `handler` as one list. When the queue is full,
+    `submit()` refuses new items so the caller can push back on its client.
+    """
+
+    def __init__(self, handler, workers=2, max_queue=10000, max_batch=256, name='prediction'):
+        self.handler = handler
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.processed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.last_lag = None
+        self.max_lag = 0.0
+        self._threads = [
+            threading.Thread(target=self._run, name=f'{name}-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def free_slots(self):
+        return self._queue.maxsize - self._queue.qsize()
+
+    def submit(self, payload):
+        """Queues one payload; returns False if the queue is full."""
+        try:
+            self._queue.put_nowait((time.monotonic(), payload))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def stats(self):
+        # Peeking at the head of the deque is atomic, and also works on the
+        # gevent/eventlet queues that replace queue.Queue when monkey-patched
+        try:
+            oldest = self._queue.queue[0][0]
+        except IndexError:
+            oldest = None
+        with self._lock:
+            return {
+                "workers": len(self._threads),
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "oldest_wait_seconds": time.monotonic() - oldest if oldest is not None else 0.0,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "rejected": self.rejected,
+                "errors": self.errors,
+                "last_lag_seconds": self.last_lag,
+                "max_lag_seconds": self.max_lag,
+            }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self.handler([payload for _, payload in batch])
+                failed = False
+            except Exception as e:
+                print(f"{threading.current_thread().name} failed on {len(batch)} items: {e}")
+                failed = True
+
+            # Lag is measured from submit to the end of processing
+            lag = time.monotonic() - batch[0][0]
+            with self._lock:
+                self.processed += len(batch)
+                self.errors += len(batch) if failed else 0
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+            for _ in batch:
+                self._queue.task_done()
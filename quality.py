@@ -0,0 +1,147 @@
+import math
+import threading
+
+
+class MetricLimits:
+    """
+    Plausibility settings for one numeric reading field.
+
+    `low`/`high` bound what the sensor can physically report (and what the
+    column can store); `spike_floor` is the smallest jump from the running mean
+    that may count as a spike, so a metric that barely moves is not flagged for
+    ordinary noise; `stuck_after` is how many identical consecutive values make
+    a sensor look frozen (None for metrics that legitimately sit still, such
+    as lux in a dark room).
+    """
+
+    def __init__(self, low, high, spike_floor, stuck_after=300):
+        self.low = low
+        self.high = high
+        self.spike_floor = spike_floor
+        self.stuck_after = stuck_after
+
+
+class MetricState:
+    """Constant-size running statistics of one metric of one device (EWMA mean and variance)."""
+    __slots__ = ('count', 'mean', 'var', 'last', 'repeats', 'flags')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.last = None
+        self.repeats = 0
+        self.flags = {}
+
+    def update(self, value, alpha):
+        if self.count == 0:
+            self.mean = value
+        else:
+            delta = value - self.mean
+            self.mean += alpha * delta
+            self.var = (1 - alpha) * (self.var + alpha * delta * delta)
+        self.count += 1
+        self.repeats = self.repeats + 1 if value == self.last else 1
+        self.last = value
+
+
+class AnomalyDetector:
+    """
+    Streaming per-device, per-metric fault detection with O(1) state.
+
+    `inspect()` checks each field of a reading and returns a list of issues:
+
+    - 'invalid': not a number (e.g. an error string from a failed sensor read)
+    - 'out_of_range': outside the metric's physical limits
+    - 'spike': more than `z` running standard deviations (and `spike_floor`)
+      away from the EWMA mean, once `warmup` values have been seen
+    - 'stuck': the same value `stuck_after` times in a row
+
+    Invalid and out-of-range values are quarantined (the caller drops them);
+    spikes and stuck values are only flagged, since they can be real, and
+    still feed the running statistics so a genuine level shift is learned.
+    Quarantined values never do.
+
+    When `reading_time` is given, readings that are not newer than the last
+    one inspected for the device (e.g. a batch the Pi resends) only get the
+    range checks, so a retry does not count twice towards the statistics.
+    """
+
+    QUARANTINE = ('invalid', 'out_of_range')
+
+    def __init__(self, limits, alpha=0.05, z=6.0, warmup=30):
+        self.limits = limits
+        self.alpha = alpha
+        self.z = z
+        self.warmup = warmup
+        self._lock = threading.Lock()
+        self._states = {}
+        self._last_time = {}
+        self.inspected = 0
+        self.flagged = 0
+        self.quarantined = 0
+
+    def inspect(self, device_id, reading, reading_time=None):
+        issues = []
+        with self._lock:
+            self.inspected += 1
+            replayed = False
+            if reading_time is not None:
+                last_time = self._last_time.get(device_id)
+                replayed = last_time is not None and reading_time <= last_time
+                if not replayed:
+                    self._last_time[device_id] = reading_time
+            for metric, limits in self.limits.items():
+                if metric not in reading or reading[metric] is None:
+                    continue
+                state = self._states.get((device_id, metric))
+                if state is None:
+                    state = self._states[(device_id, metric)] = MetricState()
+                value = reading[metric]
+                kind = None
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                    kind = 'invalid'
+                elif not limits.low <= value <= limits.high:
+                    kind = 'out_of_range'
+                elif not replayed:
+                    deviation = abs(value - state.mean)
+                    if (state.count >= self.warmup and deviation > limits.spike_floor
+                            and deviation > self.z * math.sqrt(state.var)):
+                        kind = 'spike'
+                    state.update(value, self.alpha)
+                    if limits.stuck_after is not None and state.repeats >= limits.stuck_after:
+                        kind = kind or 'stuck'
+                if kind is None:
+                    continue
+                state.flags[kind] = state.flags.get(kind, 0) + 1
+                issues.append({"metric": metric, "kind": kind, "value": value if kind != 'invalid' else str(value)})
+            if issues:
+                self.flagged += 1
+                if any(issue['kind'] in self.QUARANTINE for issue in issues):
+                    self.quarantined += 1
+        return issues
+
+    def state(self, device_id=None):
+        """Live statistics per device and metric, for the quality API."""
+        with self._lock:
+            items = [(key, state) for key, state in self._states.items() if device_id is None or key[0] == device_id]
+            devices = {}
+            for (device, metric), state in items:
+                devices.setdefault(device, {})[metric] = {
+                    "count": state.count,
+                    "mean": state.mean if state.count else None,
+                    "std": math.sqrt(state.var) if state.count else None,
+                    "last": state.last,
+                    "repeats": state.repeats,
+                    "flags": dict(state.flags),
+                }
+            return devices
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracked": len(self._states),
+                "inspected": self.inspected,
+                "flagged": self.flagged,
+                "quarantined": self.quarantined,
+            }
@@ -0,0 +1,166 @@
+import threading
+import time
+
+
+class Snapshot:
+    """
+    Nilai terakhir setiap field sensor, dipakai bersama oleh semua thread.
+
+    Setiap sensor menulis field miliknya sendiri; pengirim mengambil salinan
+    seluruh field dengan `sample()` tanpa menunggu sensor mana pun.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def update(self, values, max_age=None):
+        """
+        Menyimpan hasil satu pembacaan.
+
+        :param values: Dict field -> nilai
+        :param max_age: Umur maksimum (detik) sebelum nilai dianggap basi; None berarti tidak pernah basi
+        """
+        now = time.monotonic()
+        with self._lock:
+            for field, value in values.items():
+                self._values[field] = (value, now, max_age)
+
+    def declare(self, fields):
+        """Mendaftarkan field tanpa nilai, agar selalu ada di hasil `sample()` (berisi None)."""
+        with self._lock:
+            for field in fields:
+                self._values.setdefault(field, (None, None, None))
+
+    def sample(self):
+        """Salinan semua field; nilai yang sudah basi dikembalikan sebagai None."""
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._values.items())
+        return {
+            field: None if updated is None or (max_age is not None and now - updated > max_age) else value
+            for field, (value, updated, max_age) in items
+        }
+
+    def age(self, field):
+        """Umur (detik) nilai terakhir sebuah field, atau None jika belum pernah terbaca."""
+        with self._lock:
+            entry = self._values.get(field)
+        if entry is None or entry[1] is None:
+            return None
+        return time.monotonic() - entry[1]
+
+
+class SensorPoller:
+    def __init__(self, sensor, snapshot, stale_after=3):
+        """
+        Thread yang membaca satu sensor secara berkala dan menulis hasilnya ke snapshot.
+
+        :param sensor: Objek sensor (lihat hardware.Sensor): name, fields, interval, read(), close()
+        :param snapshot: Snapshot tujuan
+        :param stale_after: Nilai dianggap basi setelah sekian kali interval tanpa pembacaan baru
+        """
+        self.sensor = sensor
+        self.snapshot = snapshot
+        self.max_age = sensor.interval * stale_after
+        self.reads = 0
+        self.errors = 0
+        self.last_duration = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'sensor-{sensor.name}', daemon=True)
+        snapshot.declare(sensor.fields)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def poll_once(self):
+        """Membaca sensor satu kali; mengembalikan True jika berhasil."""
+        started = time.monotonic()
+        try:
+            values = self.sensor.read()
+        except Exception as e:
+            self.errors += 1
+            print(f"Error membaca sensor {self.sensor.name}: {e}")
+            return False
+        finally:
+            self.last_duration = time.monotonic() - started
+        self.reads += 1
+        self.snapshot.update(values, self.max_age)
+        return True
+
+    def _run(self):
+        # Jadwal berbasis deadline: lamanya pembacaan tidak menggeser laju polling
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            self.poll_once()
+            deadline += self.sensor.interval
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                # Sensor lebih lambat dari intervalnya: lanjut tanpa menumpuk ketertinggalan
+                deadline = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+
+class AcquisitionScheduler:
+    def __init__(self, sensors, snapshot=None, stale_after=3):
+        """
+        Menjalankan satu SensorPoller per sensor, masing-masing dengan lajunya sendiri.
+
+        :param sensors: Daftar objek sensor
+        :param snapshot: Snapshot bersama (dibuat baru jika tidak diberikan)
+        :param stale_after: Diteruskan ke setiap SensorPoller
+        """
+        self.snapshot = snapshot or Snapshot()
+        self.pollers = [SensorPoller(sensor, self.snapshot, stale_after) for sensor in sensors]
+
+    def start(self):
+        for poller in self.pollers:
+            poller.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Menghentikan semua thread lalu menutup sensor."""
+        for poller in self.pollers:
+            poller.stop()
+        deadline = time.monotonic() + timeout
+        for poller in self.pollers:
+            poller.join(max(0, deadline - time.monotonic()))
+        for poller in self.pollers:
+            try:
+                poller.sensor.close()
+            except Exception as e:
+                print(f"Error menutup sensor {poller.sensor.name}: {e}")
+
+    def stats(self):
+        return {
+            poller.sensor.name: {
+                "reads": poller.reads,
+                "errors": poller.errors,
+                "last_duration": poller.last_duration,
+            }
+            for poller in self.pollers
+        }
+
+
+def sample_every(snapshot, interval, stop, on_sample):
+    """
+    Memanggil `on_sample(snapshot.sample())` tepat setiap `interval` detik
+    sampai `stop` (threading.Event) di-set.
+    """
+    deadline = time.monotonic()
+    while not stop.is_set():
+        on_sample(snapshot.sample())
+        deadline += interval
+        delay = deadline - time.monotonic()
+        if delay < 0:
+            deadline = time.monotonic()
+            delay = 0
+        stop.wait(delay)
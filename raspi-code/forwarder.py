@@ -0,0 +1,176 @@
+import gzip
+import json
+import random
+import sqlite3
+import threading
+
+import requests
+
+
+class ReadingBuffer:
+    def __init__(self, path, max_rows=500000):
+        """
+        Buffer pembacaan yang tahan mati listrik (SQLite di kartu SD).
+
+        :param path: Lokasi file database buffer
+        :param max_rows: Batas jumlah pembacaan; jika penuh, yang paling lama dibuang (ring buffer)
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL + synchronous=NORMAL: tulis cepat, tetap aman saat listrik padam
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS readings (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)")
+        # Jumlah baris disimpan di memori agar append tidak perlu COUNT(*)
+        self._rows = self._db.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+
+    def append(self, reading):
+        """Menyimpan satu pembacaan (dict) ke buffer."""
+        with self._lock:
+            self._db.execute("INSERT INTO readings (payload) VALUES (?)", (json.dumps(reading),))
+            self._rows += 1
+            overflow = self._rows - self.max_rows
+            if overflow > 0:
+                deleted = self._db.execute(
+                    "DELETE FROM readings WHERE id IN (SELECT id FROM readings ORDER BY id LIMIT ?)", (overflow,)
+                ).rowcount
+                self._rows -= deleted
+                self.dropped += deleted
+
+    def peek(self, limit):
+        """Mengambil hingga `limit` pembacaan paling lama tanpa menghapusnya: [(id, dict), ...]."""
+        with self._lock:
+            rows = self._db.execute("SELECT id, payload FROM readings ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def ack(self, last_id):
+        """Menghapus semua pembacaan sampai `last_id` (sudah diterima server)."""
+        with self._lock:
+            self._rows -= self._db.execute("DELETE FROM readings WHERE id <= ?", (last_id,)).rowcount
+
+    def count(self):
+        return self._rows
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class BatchSender:
+    def __init__(self, buffer, url, batch_size=200, interval=5.0, timeout=(3.05, 10),
+                 min_backoff=1.0, max_backoff=300.0, session=None):
+        """
+        Thread pengirim: mengosongkan buffer ke server dalam batch terkompresi gzip
+        melalui satu sesi HTTP keep-alive, dengan retry dan exponential backoff.
+
+        :param buffer: ReadingBuffer sumber data
+        :param url: Endpoint batch server, mis. http://host:5000/api/send/batch
+        :param batch_size: Jumlah pembacaan maksimum per request
+        :param interval: Jeda (detik) saat buffer kosong
+        :param timeout: Timeout (connect, read) per request
+        """
+        self.buffer = buffer
+        self.url = url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.session = session or requests.Session()
+        self.sent = 0
+        self.discarded = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='batch-sender', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Menghentikan thread; data yang belum terkirim tetap aman di buffer."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self.session.close()
+
+    def flush(self):
+        """
+        Mengirim isi buffer sekarang juga (mis. saat alarm), tanpa menunggu
+        `interval` atau sisa jeda backoff setelah pengiriman gagal.
+        """
+        self._wake.set()
+
+    def send_once(self):
+        """
+        Mengirim satu batch. Mengembalikan jumlah pembacaan yang terkirim (0 jika
+        buffer kosong); melempar exception jika server tidak bisa dihubungi.
+        """
+        batch = self.buffer.peek(self.batch_size)
+        if not batch:
+            return 0
+        while True:
+            response = self._post([reading for _, reading in batch])
+            if response.status_code in (408, 429) or response.status_code >= 500:
+                raise RetryLater(response)
+            if response.status_code >= 400 and len(batch) > 1:
+                # Batch ditolak: persempit sampai pembacaan yang tidak valid ditemukan
+                batch = batch[:len(batch) // 2]
+                continue
+            break
+
+        self.buffer.ack(batch[-1][0])
+        if response.status_code >= 400:
+            # Pembacaan tidak valid dibuang agar antrean tidak macet
+            print(f"Reading rejected | Status: {response.status_code} | Response: {response.text}")
+            self.discarded += len(batch)
+        else:
+            self.sent += len(batch)
+        return len(batch)
+
+    def _post(self, readings):
+        body = gzip.compress(json.dumps(readings).encode(), compresslevel=6)
+        return self.session.post(
+            self.url,
+            data=body,
+            headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+            timeout=self.timeout,
+        )
+
+    def _run(self):
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            self._wake.clear()  # flush() selama pengiriman membuat jeda berikutnya langsung selesai
+            try:
+                self.send_once()
+            except Exception as e:
+                self.failures += 1
+                # Exponential backoff dengan jitter; ikuti Retry-After dari server jika ada
+                delay = backoff * random.uniform(0.5, 1.0)
+                if isinstance(e, RetryLater) and e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                print(f"Error sending data: {e} | retry in {delay:.1f}s ({self.buffer.count()} buffered)")
+                backoff = min(backoff * 2, self.max_backoff)
+                # stop() dan flush() sama-sama memotong jeda ini
+                self._wake.wait(delay)
+                continue
+            backoff = self.min_backoff
+            # Kirim lagi langsung hanya jika sudah ada satu batch penuh yang menunggu
+            # atau flush() diminta
+            if self.buffer.count() < self.batch_size:
+                self._wake.wait(self.interval)
+
+
+class RetryLater(Exception):
+    """Server sedang sibuk atau error sementara (408, 429, 5xx)."""
+
+    def __init__(self, response):
+        super().__init__(f"Status: {response.status_code}")
+        try:
+            self.retry_after = float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            self.retry_after = None
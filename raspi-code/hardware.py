@@ -0,0 +1,232 @@
+import random
+import threading
+import time
+
+
+class Sensor:
+    """
+    Antarmuka sensor untuk AcquisitionScheduler.
+
+    `read()` mengembalikan dict field -> nilai dan melempar exception jika
+    pembacaan gagal; `interval` adalah jeda (detik) antar pembacaan.
+    Driver perangkat keras diimpor di dalam adapter, sehingga modul ini
+    (dan sensor simulasi) tetap bisa dipakai di luar Raspberry Pi.
+    """
+    name = 'sensor'
+    fields = ()
+    interval = 1.0
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LightSensor(Sensor):
+    name = 'bh1750'
+    fields = ('illuminance',)
+
+    def __init__(self, interval=1.0, **kwargs):
+        from bh1750 import BH1750
+        self.interval = interval
+        self.device = BH1750(**kwargs)
+
+    def read(self):
+        lux = self.device.read_lux()
+        if lux is None:
+            raise IOError("BH1750 tidak merespons")
+        return {"illuminance": lux}
+
+    def close(self):
+        self.device.close()
+
+
+class ClimateSensor(Sensor):
+    name = 'sht20'
+    fields = ('temp', 'humidity')
+
+    def __init__(self, interval=2.0, **kwargs):
+        from sht20 import SHT20
+        self.interval = interval
+        self.device = SHT20(**kwargs)
+
+    def read(self):
+        temp = self.device.read_temperature()
+        humidity = self.device.read_humidity()
+        # Driver SHT20 mengembalikan pesan error (str) jika gagal
+        for value in (temp, humidity):
+            if isinstance(value, str):
+                raise IOError(value)
+        return {"temp": temp, "humidity": humidity}
+
+    def close(self):
+        self.device.close()
+
+
+class CO2Sensor(Sensor):
+    name = 'mhz19'
+    fields = ('co2',)
+
+    def __init__(self, interval=1.0, **kwargs):
+        from mhz19 import MHZ19
+        self.interval = interval
+        self.device = MHZ19(**kwargs)
+
+    def read(self):
+        co2 = self.device.read_co2()
+        if co2 is None:
+            raise IOError("MH-Z19 belum memberi nilai baru")
+        return {"co2": co2}
+
+    def close(self):
+        self.device.cleanup()
+
+
+class PowerSensor(Sensor):
+    name = 'pzem004t'
+    fields = ('voltage', 'current', 'power', 'energy_wh', 'frequency', 'power_factor')
+
+    def __init__(self, interval=1.0, **kwargs):
+        from pzem import PZEM004T
+        self.interval = interval
+        self.device = PZEM004T(**kwargs)
+
+    def read(self):
+        # Satu transaksi Modbus untuk semua register; ModbusError diteruskan ke poller
+        data = self.device.read_all()
+        return {field: data[field] for field in self.fields}
+
+    def close(self):
+        self.device.close()
+
+
+class NoiseSensor(Sensor):
+    name = 'noise'
+    fields = ('noise',)
+
+    def __init__(self, slave, register, port=None, functioncode=3, scale=1.0, interval=1.0, bus=None):
+        """
+        Sensor kebisingan Modbus, dibaca lewat bus bersama (lihat modbus_bus.ModbusBus).
+        Alamatnya bergantung pada model sensor; lihat NOISE_MODBUS di main.py.
+
+        :param slave: Alamat slave Modbus sensor
+        :param register: Alamat register nilai kebisingan
+        :param port: Port serial RS-485 (tidak dipakai jika `bus` diberikan)
+        :param functioncode: 3 (holding register) atau 4 (input register)
+        :param scale: Pengali nilai mentah register
+        """
+        from modbus_bus import ModbusBus
+        self.interval = interval
+        self.slave = slave
+        self.register = register
+        self.functioncode = functioncode
+        self.scale = scale
+        self._shared = bus is None
+        self.bus = ModbusBus.for_port(port) if self._shared else bus
+
+    def read(self):
+        value = self.bus.read_registers(self.slave, self.register, 1, self.functioncode)[0]
+        return {"noise": value * self.scale}
+
+    def close(self):
+        # Bus bersama hanya dilepas; PZEM di port yang sama mungkin masih memakainya
+        if self._shared:
+            self.bus.release()
+            self._shared = False
+
+
+class GasSensor(Sensor):
+    name = 'gas'
+    fields = ('gas_detection',)
+
+    def __init__(self, interval=0.5, **kwargs):
+        from gas import GAS
+        self.interval = interval
+        self.device = GAS(**kwargs)
+
+    def read(self):
+        return {"gas_detection": any(self.device.get_states())}
+
+    def close(self):
+        self.device.cleanup()
+
+
+class SimulatedSensor(Sensor):
+    def __init__(self, name, fields, interval=1.0, delay=0.0, fail_rate=0.0, seed=None):
+        """
+        Sensor tiruan untuk pengujian tanpa perangkat keras.
+
+        :param name: Nama sensor (dipakai untuk nama thread)
+        :param fields: Dict field -> (nilai awal, langkah acak maksimum[, hanya naik]); nilai bool dibalik
+                       dengan peluang = langkah; "hanya naik" untuk penghitung kumulatif seperti energi
+        :param interval: Jeda (detik) antar pembacaan
+        :param delay: Lama satu pembacaan (detik), meniru waktu konversi sensor asli
+        :param fail_rate: Peluang sebuah pembacaan gagal (melempar IOError)
+        """
+        self.name = name
+        self.fields = tuple(fields)
+        self.interval = interval
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self._steps = {field: spec[1] for field, spec in fields.items()}
+        self._increasing = {field for field, spec in fields.items() if len(spec) > 2 and spec[2]}
+        self._values = {field: spec[0] for field, spec in fields.items()}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reads = 0
+
+    def read(self):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.reads += 1
+            if self._random.random() < self.fail_rate:
+                raise IOError(f"Pembacaan simulasi {self.name} gagal")
+            for field, step in self._steps.items():
+                value = self._values[field]
+                if isinstance(value, bool):
+                    self._values[field] = (not value) if self._random.random() < step else value
+                else:
+                    low = 0 if field in self._increasing else -step
+                    value += self._random.uniform(low, step)
+                    self._values[field] = round(value) if isinstance(self._values[field], int) else round(value, 2)
+            return dict(self._values)
+
+
+def hardware_sensors(co2_mode='pwm', noise=None):
+    """
+    Sensor fisik yang terpasang di Raspberry Pi, dengan laju sesuai waktu baca masing-masing.
+
+    :param co2_mode: Backend MH-Z19: 'pwm' atau 'uart'
+    :param noise: Argumen NoiseSensor (port, slave, register, functioncode, scale)
+    """
+    return [
+        LightSensor(interval=1.0),   # konversi ~0,2 detik
+        ClimateSensor(interval=2.0),  # 2 x ~0,1 detik
+        CO2Sensor(interval=1.0, mode=co2_mode),  # diukur di latar belakang, read_co2() instan
+        PowerSensor(interval=1.0),   # satu transaksi Modbus untuk 10 register
+        NoiseSensor(interval=1.0, **noise),
+        GasSensor(interval=0.5),
+    ]
+
+
+def simulated_sensors(seed=None, speedup=1.0):
+    """
+    Padanan simulasi dari `hardware_sensors()`, dengan waktu baca yang mirip.
+
+    :param speedup: Pembagi interval dan waktu baca, untuk pengujian yang lebih cepat
+    """
+    def sensor(name, fields, interval, delay):
+        return SimulatedSensor(name, fields, interval / speedup, delay / speedup, seed=seed)
+
+    return [
+        sensor('bh1750', {"illuminance": (350.0, 15.0)}, 1.0, 0.2),
+        sensor('sht20', {"temp": (27.0, 0.1), "humidity": (65.0, 0.3)}, 2.0, 0.2),
+        sensor('mhz19', {"co2": (600.0, 10.0)}, 1.0, 0.0),
+        sensor('pzem004t', {"voltage": (220.0, 1.0), "current": (0.5, 0.02), "power": (110.0, 5.0),
+                            "energy_wh": (12000, 1, True), "frequency": (50.0, 0.05),
+                            "power_factor": (0.9, 0.01)}, 1.0, 0.03),
+        sensor('noise', {"noise": (45.0, 2.0)}, 1.0, 0.05),
+        sensor('gas', {"gas_detection": (False, 0.01)}, 0.5, 0.0),
+    ]
@@ -1,66 +1,110 @@
-from bh1750 import BH1750  # Import kelas BH1750
-from sht20 import SHT20  # Import kelas SHT20
-from mhz19 import MHZ19  # Import kelas MH-Z19
-from arduino import ModbusSensor  # Import kelas ModbusSensor
-from pzem import PZEM004T  # Import kelas PZEM004T
-from gas import GAS
-import time
-import random
-import requests
-import datetime
+from acquisition import AcquisitionScheduler, sample_every
+from hardware import hardware_sensors, simulated_sensors
+from forwarder import ReadingBuffer, BatchSender
+from reporting import ReportingPolicy
+import os
+import threading
+from datetime import datetime, timezone
 
-API_URL = "192.168.137.19"
+API_URL = "http://192.168.137.19:5000/api/send/batch"
+DEVICE_ID = "pi-01"  # Harus unik untuk setiap Raspberry Pi
+# Buffer di kartu SD: pembacaan tetap tersimpan selama server/jaringan mati
+BUFFER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "readings.db")
+BUFFER_MAX_ROWS = 500000  # ~5,8 hari pada 1 pembacaan/detik
+SAMPLE_INTERVAL = 1.0  # Detik antar pembacaan yang disimpan ke buffer
+# SIMULATE=1 menjalankan program dengan sensor simulasi (tanpa perangkat keras)
+SIMULATE = os.environ.get("SIMULATE") == "1"
+# Backend MH-Z19: "pwm" (interrupt tepi di GPIO18) atau "uart" (pin TX/RX, /dev/serial0)
+MHZ19_MODE = os.environ.get("MHZ19_MODE", "pwm")
+# Sensor kebisingan Modbus RS-485. Dulu dibaca lewat arduino.ModbusSensor yang tidak
+# ada di repositori ini; nilai bawaan di bawah hanya meniru pemanggilan
+# read_register_data(0) itu (holding register 0 pada slave 1 di /dev/ttyUSB0) dan
+# harus dicocokkan dengan manual sensor serta pengkabelannya lewat variabel lingkungan.
+NOISE_MODBUS = {
+    "port": os.environ.get("NOISE_PORT", "/dev/ttyUSB0"),
+    "slave": int(os.environ.get("NOISE_SLAVE", 1)),
+    "register": int(os.environ.get("NOISE_REGISTER", 0)),
+    "functioncode": int(os.environ.get("NOISE_FUNCTIONCODE", 3)),  # 3 holding, 4 input register
+    "scale": float(os.environ.get("NOISE_SCALE", 1.0)),  # dB per satuan register, mis. 0.1
+}
 
-def send_data(data):
-    try:
-        response = requests.post(API_URL, json=data)
-        print(f"{datetime.now().isoformat()} - Sent data | Status: {response.status_code} | Response: {response.text}")
-    except Exception as e:
-        print(f"Error sending data: {str(e)}")
+# Pelaporan berbasis perubahan: pembacaan hanya dikirim jika salah satu metrik
+# bergeser melewati deadband-nya dari nilai terakhir yang dikirim. Ambang berupa
+# angka absolut, atau (absolut, relatif) untuk metrik yang rentangnya lebar.
+DEADBANDS = {
+    "temp": 0.2,                 # °C
+    "humidity": 1.0,             # %RH
+    "illuminance": (5.0, 0.05),  # lux, atau 5% dari nilai terakhir
+    "co2": 25,                   # ppm
+    "noise": 3.0,                # dB
+    "current": (0.05, 0.05),     # A
+    "voltage": 2.0,              # V
+    "power": (5.0, 0.05),        # W
+    "energy_wh": 10,             # Wh
+    "frequency": 0.1,            # Hz
+    "power_factor": 0.02,
+}
+# Heartbeat: kirim paling lambat setiap MAX_SILENCE detik walaupun tidak ada perubahan
+# (server meneruskan nilai terakhir paling lama CARRY_FORWARD_SECONDS, default 180)
+MAX_SILENCE = 60.0
+# Di atas batas ini setiap pembacaan dikirim (di bawah ambang alarm CO2 server, 3000 ppm)
+FULL_RATE_ABOVE = {"co2": 2500}
+# REPORT_EVERY_SAMPLE=1 mematikan deadband: setiap pembacaan dikirim seperti sebelumnya
+REPORT_EVERY_SAMPLE = os.environ.get("REPORT_EVERY_SAMPLE") == "1"
 
-# Main program
-if __name__ == "__main__":  
-    try:
-        bh1750 = BH1750()
-        sht20 = SHT20()
-        mhz19_sensor = MHZ19()  # Objek untuk sensor CO2 MH-Z19
-        #mpu6050 = MPU6050()
-        modbus_sensor = ModbusSensor()  # Inisialisasi sensor Modbus dengan port yang sudah diatur di kelas
-        pzem_sensor = PZEM004T()  # Inisialisasi sensor PZEM004T
-        gas = GAS()
 
-        while True:
-            lux = bh1750.read_lux()
-            temp = sht20.read_temperature()
-            humidity = sht20.read_humidity
-            co2 = mhz19_sensor.read_co2()
-            voltage, current, power = pzem_sensor.read_data()
-            noise = modbus_sensor.read_register_data(0)
-            deteksi_gas = gas.is_high()
+def build_reading(values):
+    """Menyusun payload untuk server dari snapshot nilai sensor terakhir."""
+    return {
+        "device_id": DEVICE_ID,
+        "temp": values.get("temp"),
+        "humidity": values.get("humidity"),
+        "illuminance": values.get("illuminance"),
+        "co2": values.get("co2"),
+        "noise": values.get("noise"),
+        "current": values.get("current"),
+        "voltage": values.get("voltage"),
+        "power": values.get("power"),
+        "energy_wh": values.get("energy_wh"),  # Penghitung energi kumulatif PZEM-004T
+        "frequency": values.get("frequency"),
+        "power_factor": values.get("power_factor"),
+        "gas_detection": values.get("gas_detection"),
+        "people": True,
+        "earthquake": False,
+        "time": datetime.now(timezone.utc).isoformat()  # Waktu pembacaan di perangkat
+    }
 
-            data = {
-                "temp": temp,
-                "humidity": humidity,
-                "illuminance": lux,
-                "co2": co2,
-                "noise": noise,  
-                "current": current,
-                "voltage": voltage,
-                "gas_detection": deteksi_gas,
-                "people": True,
-                "earthquake": False
-            }
-            
-            send_data(data)
 
-            time.sleep(1)
+# Main program
+if __name__ == "__main__":
+    buffer = ReadingBuffer(BUFFER_PATH, max_rows=BUFFER_MAX_ROWS)
+    sender = BatchSender(buffer, API_URL).start()  # Thread pengirim batch ke server
+    # Setiap sensor dibaca di thread sendiri dengan lajunya sendiri; loop utama
+    # hanya mengambil snapshot nilai terakhir setiap SAMPLE_INTERVAL detik
+    scheduler = AcquisitionScheduler(simulated_sensors() if SIMULATE else hardware_sensors(MHZ19_MODE, NOISE_MODBUS)).start()
+    policy = None if REPORT_EVERY_SAMPLE else ReportingPolicy(
+        DEADBANDS, max_silence=MAX_SILENCE, full_rate_above=FULL_RATE_ABOVE
+    )
+
+    def report(values):
+        reading = build_reading(values)
+        reason = policy.check(reading) if policy else 'every_sample'
+        if reason is None:
+            return  # Masih dalam deadband; server memakai nilai terakhir
+        buffer.append(reading)
+        if reason in ReportingPolicy.URGENT:
+            sender.flush()  # Gas/gempa tidak menunggu batch berikutnya
+
+    stop = threading.Event()
+    try:
+        sample_every(scheduler.snapshot, SAMPLE_INTERVAL, stop, report)
 
     except KeyboardInterrupt:
         print("\nProgram dihentikan.")
 
     finally:
-        bh1750.close()
-        sht20.close()
-        mhz19_sensor.cleanup()  # Membersihkan konfigurasi GPIO dan sensor CO2 MH-Z19
-        modbus_sensor.close()  # Menutup koneksi serial Modbus saat program dihentikan
-        pzem_sensor.close()  # Menutup koneksi PZEM004T
+        if policy:
+            print(f"Pelaporan: {policy.stats()}")
+        scheduler.stop()  # Menghentikan thread sensor lalu menutup I2C, GPIO dan koneksi serial
+        sender.stop()  # Pembacaan yang belum terkirim dikirim saat program dijalankan lagi
+        buffer.close()
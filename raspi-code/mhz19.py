@@ -1,16 +1,20 @@
-import time
 import RPi.GPIO as GPIO
+from mhz19_backend import GPIOEdgeSource, PWMBackend, UARTBackend
 
 class MHZ19:
-    def __init__(self, pwm_pin=18, servo_pin=17, pin11=11, pin9=9):
-        """Inisialisasi sensor MH-Z19 (PWM), pin GPIO untuk servo, dan pin kontrol eksternal."""
+    def __init__(self, pwm_pin=18, servo_pin=17, pin11=11, pin9=9, mode='pwm', uart_port='/dev/serial0', backend=None):
+        """
+        Inisialisasi sensor MH-Z19, pin GPIO untuk servo, dan pin kontrol eksternal.
+
+        :param mode: 'pwm' (interrupt tepi di pwm_pin) atau 'uart' (protokol serial 9 byte di uart_port)
+        :param backend: Backend pembaca CO2 siap pakai (mis. PWMBackend dengan SimulatedEdgeSource); mengabaikan mode
+        """
         self.pwm_pin = pwm_pin
         self.servo_pin = servo_pin
         self.TGS_PIN = pin11
         self.MQ6_PIN = pin9
 
         GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.pwm_pin, GPIO.IN)
         GPIO.setup(self.servo_pin, GPIO.OUT)
         GPIO.setup(self.TGS_PIN, GPIO.IN)
         GPIO.setup(self.MQ6_PIN, GPIO.IN)
@@ -18,31 +22,18 @@ class MHZ19:
         self.pwm = GPIO.PWM(self.servo_pin, 50)  # 50Hz
         self.pwm.start(7)  # Mulai PWM dengan duty cycle 7% (posisi 0 derajat)
 
-    # Fungsi untuk membaca data CO2 dari sensor MH-Z19 via PWM
-    def read_co2(self, duration=1.004):
-        """Membaca data CO2 dari sensor MH-Z19 melalui sinyal PWM"""
-        start_time = time.time()
-        high_time = 0
-        low_time = 0
-
-        while (time.time() - start_time) < duration:
-            if GPIO.input(self.pwm_pin) == GPIO.LOW:
-                low_start = time.time()
-                while GPIO.input(self.pwm_pin) == GPIO.LOW:
-                    pass
-                low_time += time.time() - low_start
-            if GPIO.input(self.pwm_pin) == GPIO.HIGH:
-                high_start = time.time()
-                while GPIO.input(self.pwm_pin) == GPIO.HIGH:
-                    pass
-                high_time += time.time() - high_start
+        # Pembacaan CO2 berjalan di latar belakang; read_co2() hanya mengambil nilai terakhir
+        if backend is None:
+            if mode == 'uart':
+                backend = UARTBackend(uart_port)
+            else:
+                backend = PWMBackend(GPIOEdgeSource(self.pwm_pin))
+        self.backend = backend.start()
 
-        # Rumus konversi sesuai datasheet MH-Z19 PWM
-        try:
-            co2_ppm = 2000 * ((high_time - 0.002) / (high_time + low_time - 0.004))
-            return round(co2_ppm)
-        except ZeroDivisionError:
-            return None
+    # Fungsi untuk membaca data CO2 dari sensor MH-Z19
+    def read_co2(self):
+        """Nilai CO2 terakhir (ppm) dari backend, tanpa menunggu; None jika belum ada atau sudah basi."""
+        return self.backend.read()
 
     # Fungsi untuk mengendalikan servo berdasarkan nilai CO2 menggunakan PWM
     def control_servo(self, co2_value):
@@ -59,7 +50,8 @@ class MHZ19:
         self.pwm.stop()
 
     def cleanup(self):
-        """Membersihkan konfigurasi GPIO saat program dihentikan."""
+        """Menghentikan backend dan membersihkan konfigurasi GPIO saat program dihentikan."""
+        self.backend.stop()
         GPIO.cleanup()
 
     def print_data(self):
@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import deque
+
+# Datasheet MH-Z19: satu siklus PWM 1004 ms, diawali 2 ms HIGH dan diakhiri 2 ms LOW
+PWM_CYCLE = 1.004
+PWM_MARGIN = 0.002
+PWM_RANGE = 2000  # ppm pada duty cycle penuh (rentang 0-2000 ppm)
+
+# Perintah "read CO2 concentration" protokol serial 9 byte
+UART_READ_COMMAND = bytes([0xFF, 0x01, 0x86, 0x00, 0x00, 0x00, 0x00, 0x00, 0x79])
+
+
+def pwm_ppm(high_time, period, span=PWM_RANGE):
+    """Rumus konversi sesuai datasheet: ppm = span * (TH - 2ms) / (TH + TL - 4ms)."""
+    return span * (high_time - PWM_MARGIN) / (period - 2 * PWM_MARGIN)
+
+
+def uart_checksum(frame):
+    return (0xFF - (sum(frame[1:8]) & 0xFF) + 1) & 0xFF
+
+
+def parse_uart_frame(frame):
+    """
+    Mengurai respons 9 byte dari perintah 0x86.
+
+    :return: Konsentrasi CO2 (ppm)
+    :raises ValueError: Jika header atau checksum tidak cocok
+    """
+    if len(frame) != 9 or frame[0] != 0xFF or frame[1] != 0x86:
+        raise ValueError(f"Respons MH-Z19 tidak valid: {bytes(frame).hex()}")
+    if uart_checksum(frame) != frame[8]:
+        raise ValueError(f"Checksum MH-Z19 salah: {bytes(frame).hex()}")
+    return (frame[2] << 8) | frame[3]
+
+
+class GPIOEdgeSource:
+    def __init__(self, pin):
+        """
+        Sumber tepi sinyal dari interrupt GPIO (RPi.GPIO add_event_detect).
+
+        :param pin: Nomor pin BCM keluaran PWM sensor
+        """
+        self.pin = pin
+
+    def start(self, callback):
+        """Memanggil `callback(level, timestamp)` di setiap tepi naik dan turun."""
+        import RPi.GPIO as GPIO
+        GPIO.setup(self.pin, GPIO.IN)
+        # Waktu diambil secepat mungkin di thread callback, dengan jam monotonic
+        GPIO.add_event_detect(
+            self.pin, GPIO.BOTH,
+            callback=lambda channel: callback(GPIO.input(channel), time.monotonic()),
+        )
+
+    def stop(self):
+        import RPi.GPIO as GPIO
+        GPIO.remove_event_detect(self.pin)
+
+
+class SimulatedEdgeSource:
+    """Sumber tepi tiruan untuk pengujian: menghasilkan siklus PWM untuk nilai ppm tertentu."""
+
+    def __init__(self, start_time=0.0):
+        self.callback = None
+        self.time = start_time
+        self._rising = False
+
+    def start(self, callback):
+        self.callback = callback
+
+    def stop(self):
+        self.callback = None
+
+    def emit(self, level, timestamp):
+        if self.callback is not None:
+            self.callback(level, timestamp)
+
+    def feed(self, ppm, cycles=1, period=PWM_CYCLE, jitter=0.0):
+        """
+        Mengirim `cycles` siklus PWM lengkap (tepi naik lalu tepi turun) untuk `ppm`.
+
+        :param jitter: Geser waktu tepi turun (detik), meniru ketidakpastian timestamp
+        """
+        high_time = PWM_MARGIN + ppm / PWM_RANGE * (period - 2 * PWM_MARGIN)
+        for _ in range(cycles):
+            if not self._rising:
+                self.emit(1, self.time)
+                self._rising = True
+            self.emit(0, self.time + high_time + jitter)
+            self.time += period
+            # Tepi naik siklus berikutnya menutup siklus ini
+            self.emit(1, self.time)
+
+
+class PWMBackend:
+    def __init__(self, edge_source, cycles=4, max_age=5.0, tolerance=0.05, span=PWM_RANGE):
+        """
+        Mengukur duty cycle PWM dari timestamp tepi sinyal, tanpa busy-wait.
+
+        :param edge_source: GPIOEdgeSource atau SimulatedEdgeSource
+        :param cycles: Jumlah siklus terakhir yang dirata-rata
+        :param max_age: Nilai dianggap basi (None) jika tidak ada siklus valid selama sekian detik
+        :param tolerance: Siklus yang periodenya menyimpang lebih dari ini (fraksi) dari 1004 ms dibuang
+        :param span: Rentang ukur sensor (2000 atau 5000 ppm)
+        """
+        self.edge_source = edge_source
+        self.max_age = max_age
+        self.tolerance = tolerance
+        self.span = span
+        self.rejected = 0
+        self._values = deque(maxlen=cycles)
+        self._lock = threading.Lock()
+        self._rise = None
+        self._fall = None
+        self._updated = None
+
+    def start(self):
+        self.edge_source.start(self.on_edge)
+        return self
+
+    def stop(self):
+        self.edge_source.stop()
+
+    def on_edge(self, level, timestamp):
+        if not level:
+            if self._rise is not None:
+                self._fall = timestamp
+            return
+        # Tepi naik: menutup siklus sebelumnya (naik -> turun -> naik)
+        rise, fall = self._rise, self._fall
+        self._rise, self._fall = timestamp, None
+        if rise is None or fall is None:
+            return
+        period = timestamp - rise
+        if abs(period - PWM_CYCLE) > PWM_CYCLE * self.tolerance:
+            # Tepi yang terlewat atau glitch
+            self.rejected += 1
+            return
+        ppm = min(max(pwm_ppm(fall - rise, period, self.span), 0), self.span)
+        with self._lock:
+            self._values.append(ppm)
+            self._updated = time.monotonic()
+
+    def read(self):
+        """Rata-rata beberapa siklus terakhir (ppm), atau None jika belum ada / sudah basi."""
+        with self._lock:
+            if not self._values or time.monotonic() - self._updated > self.max_age:
+                return None
+            return round(sum(self._values) / len(self._values))
+
+
+class UARTBackend:
+    def __init__(self, port='/dev/serial0', interval=1.0, max_age=5.0, serial_port=None):
+        """
+        Membaca CO2 lewat protokol serial 9 byte (9600 baud) di thread latar belakang.
+
+        :param port: Port serial sensor
+        :param interval: Jeda (detik) antar permintaan
+        :param max_age: Nilai dianggap basi (None) jika tidak ada respons valid selama sekian detik
+        :param serial_port: Objek mirip serial.Serial (untuk pengujian); jika None, port dibuka dengan pyserial
+        """
+        if serial_port is None:
+            import serial
+            serial_port = serial.Serial(port, baudrate=9600, bytesize=8, parity='N', stopbits=1, timeout=1)
+        self.serial = serial_port
+        self.interval = interval
+        self.max_age = max_age
+        self.errors = 0
+        self._value = None
+        self._updated = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='mhz19-uart', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(2)
+        self.serial.close()
+
+    def poll_once(self):
+        """Satu transaksi perintah 0x86; mengembalikan ppm atau melempar exception."""
+        self.serial.reset_input_buffer()
+        self.serial.write(UART_READ_COMMAND)
+        ppm = parse_uart_frame(self.serial.read(9))
+        with self._lock:
+            self._value = ppm
+            self._updated = time.monotonic()
+        return ppm
+
+    def read(self):
+        with self._lock:
+            if self._value is None or time.monotonic() - self._updated > self.max_age:
+                return None
+            return self._value
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error membaca MH-Z19 (UART): {e}")
+            self._stop.wait(self.interval)
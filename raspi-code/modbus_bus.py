@@ -0,0 +1,154 @@
+import struct
+import threading
+import time
+
+import minimalmodbus
+
+# minimalmodbus melempar turunan ModbusException (sebuah IOError) untuk timeout,
+# jawaban yang tidak valid (mis. CRC salah) dan exception response dari perangkat
+ModbusError = minimalmodbus.ModbusException
+
+
+def crc16(frame):
+    """CRC-16/MODBUS (polinom 0xA001, awal 0xFFFF), untuk frame FakeModbusSerial."""
+    crc = 0xFFFF
+    for byte in frame:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def with_crc(frame):
+    return bytes(frame) + struct.pack('<H', crc16(frame))
+
+
+class ModbusBus:
+    # Satu bus per port serial, dipakai bersama oleh semua perangkat di jalur RS-485 yang sama
+    _buses = {}
+    _buses_lock = threading.Lock()
+
+    def __init__(self, serial_port):
+        """
+        Satu jalur Modbus RTU yang dipakai bersama beberapa perangkat. Protokolnya
+        (framing, CRC, jeda antar frame, timeout) ditangani minimalmodbus: semua
+        slave memakai satu minimalmodbus.Instrument yang alamatnya diganti per
+        transaksi, dan lock menyerialkan transaksi dari thread yang berbeda.
+
+        :param serial_port: Objek mirip serial.Serial yang sudah terbuka dan diatur
+        """
+        self.instrument = minimalmodbus.Instrument(serial_port, 1)
+        self.serial = self.instrument.serial
+        self.transactions = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.port = None
+        self._users = 0
+
+    @classmethod
+    def for_port(cls, port, baudrate=9600, timeout=0.5):
+        """
+        Bus bersama untuk `port`; dibuka dengan pyserial saat pertama kali diminta.
+        Setiap pemanggil wajib memanggil release() sekali saat selesai; port baru
+        ditutup setelah pemakai terakhir melepasnya.
+        """
+        with cls._buses_lock:
+            bus = cls._buses.get(port)
+            if bus is None:
+                import serial
+                bus = cls(serial.Serial(port, baudrate=baudrate, bytesize=8, parity='N', stopbits=1, timeout=timeout))
+                bus.port = port
+                cls._buses[port] = bus
+            bus._users += 1
+            return bus
+
+    def release(self):
+        """Melepas bus yang didapat dari for_port(); menutup port jika tidak ada pemakai lain."""
+        with self._buses_lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            if self._buses.get(self.port) is self:
+                del self._buses[self.port]
+        self.close()
+
+    @classmethod
+    def close_all(cls):
+        with cls._buses_lock:
+            for bus in cls._buses.values():
+                bus._users = 0
+                bus.close()
+            cls._buses.clear()
+
+    def read_registers(self, slave, address, count, functioncode=4):
+        """
+        Membaca `count` register berurutan dalam satu transaksi (fungsi 3 atau 4).
+
+        :return: List nilai register 16-bit tanpa tanda
+        :raises ModbusError: Jika perangkat tidak menjawab atau jawabannya tidak valid
+        """
+        with self._lock:
+            self.instrument.address = slave
+            try:
+                values = self.instrument.read_registers(address, count, functioncode)
+            except ModbusError:
+                self.errors += 1
+                raise
+            self.transactions += 1
+            return values
+
+    def close(self):
+        with self._lock:
+            self.serial.close()
+
+
+class FakeModbusSerial:
+    def __init__(self, registers, baudrate=9600, simulate_timing=False):
+        """
+        Port serial tiruan yang menjawab request Modbus RTU, untuk pengujian tanpa perangkat.
+
+        :param registers: Dict (slave, functioncode) -> dict alamat -> nilai register
+        :param simulate_timing: Jika True, write/read ditunda sesuai lama transmisi pada baudrate
+        """
+        self.registers = registers
+        self.port = None
+        self.baudrate = baudrate
+        self.timeout = 0.5
+        self.is_open = True
+        self.byte_time = 11 / baudrate if simulate_timing else 0.0
+        self.requests = []
+        self._pending = b''
+
+    def open(self):
+        self.is_open = True
+
+    def reset_input_buffer(self):
+        self._pending = b''
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        time.sleep(len(data) * self.byte_time)
+        self.requests.append(bytes(data))
+        slave, functioncode, address, count = struct.unpack('>BBHH', data[:6])
+        table = self.registers.get((slave, functioncode))
+        if table is None:
+            return len(data)  # tidak ada perangkat: request tidak dijawab (timeout)
+        if any(address + i not in table for i in range(count)):
+            self._pending = with_crc(bytes([slave, functioncode | 0x80, 0x02]))  # illegal data address
+        else:
+            values = [table[address + i] for i in range(count)]
+            self._pending = with_crc(struct.pack(f'>BBB{count}H', slave, functioncode, 2 * count, *values))
+        return len(data)
+
+    def read(self, size):
+        data, self._pending = self._pending[:size], self._pending[size:]
+        time.sleep(len(data) * self.byte_time)
+        return data
+
+    def close(self):
+        self.is_open = False
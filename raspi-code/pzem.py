@@ -1,45 +1,58 @@
-import minimalmodbus
-import serial
-import time
-from datetime import datetime
+from modbus_bus import ModbusBus, ModbusError
+
+# Input register PZEM-004T v3.0 (fungsi 4), dibaca sekaligus mulai alamat 0x0000:
+# 0 tegangan (0,1 V), 1-2 arus (0,001 A), 3-4 daya (0,1 W), 5-6 energi (1 Wh),
+# 7 frekuensi (0,1 Hz), 8 faktor daya (0,01), 9 status alarm
+PZEM_REGISTER_COUNT = 10
+
+
+def decode_pzem(registers):
+    """Mengubah 10 input register PZEM-004T menjadi nilai dalam satuan fisik."""
+    def u32(low):
+        return (registers[low + 1] << 16) | registers[low]  # word rendah lebih dulu
+
+    return {
+        "voltage": round(registers[0] * 0.1, 1),
+        "current": round(u32(1) * 0.001, 3),
+        "power": round(u32(3) * 0.1, 1),
+        "energy_wh": u32(5),
+        "frequency": round(registers[7] * 0.1, 1),
+        "power_factor": round(registers[8] * 0.01, 2),
+        "alarm": registers[9] == 0xFFFF,
+    }
+
 
 class PZEM004T:
-    def __init__(self, port='/dev/ttyUSB1', device_address=0x01):
-        """Inisialisasi koneksi dengan sensor PZEM-004T."""
+    def __init__(self, port='/dev/ttyUSB1', device_address=0x01, bus=None):
+        """
+        Inisialisasi koneksi dengan sensor PZEM-004T.
+
+        :param port: Port serial RS-485; perangkat lain di port yang sama memakai bus yang sama
+        :param device_address: Alamat slave Modbus
+        :param bus: ModbusBus yang sudah ada (mis. dengan FakeModbusSerial untuk pengujian)
+        """
         self.port = port
         self.device_address = device_address
-        self.instrument = minimalmodbus.Instrument(self.port, self.device_address)
-        self.instrument.serial.baudrate = 9600
-        self.instrument.serial.bytesize = 8
-        self.instrument.serial.parity = serial.PARITY_NONE
-        self.instrument.serial.stopbits = 1
-        self.instrument.serial.timeout = 1
+        # Bus dari luar ditutup oleh pemiliknya; bus bersama hanya dilepas
+        self._shared = bus is None
+        self.bus = ModbusBus.for_port(port) if self._shared else bus
+
+    def read_all(self):
+        """Membaca semua besaran PZEM-004T dalam satu transaksi Modbus."""
+        return decode_pzem(self.bus.read_registers(self.device_address, 0x0000, PZEM_REGISTER_COUNT, functioncode=4))
 
     def read_data(self):
-        """Membaca data dari sensor PZEM-004T dan menampilkan hasilnya."""
+        """Membaca (tegangan V, arus A, daya W) dari sensor PZEM-004T."""
         try:
-            # Read measurement data
-            voltage = self.instrument.read_register(0x0000, number_of_decimals=1, functioncode=4)
-            currentlow = self.instrument.read_register(0x0001, functioncode=4)
-            currenthigh = self.instrument.read_register(0x0002, functioncode=4)
-            current = (currenthigh << 16) + currentlow
-            power_low = self.instrument.read_register(0x0003, functioncode=4)
-            power_high = self.instrument.read_register(0x0004, functioncode=4)
-            power = (power_high << 16) + power_low
-
-            # Menampilkan data
-            # print(f"Voltage: {voltage} V")
-            # print(f"Current: {current * 0.001} A")
-            # print(f"Power: {power * 0.1} W")
-
-            # Return the data
-            return voltage, current * 0.001, power * 0.1
-        except minimalmodbus.IllegalRequestError as e:
+            data = self.read_all()
+            return data["voltage"], data["current"], data["power"]
+        except ModbusError as e:
             print(f"Error: {e}")
             return None, None, None
 
     def close(self):
-        """Menutup koneksi serial ke perangkat."""
-        self.instrument.serial.close()
-        print("Koneksi ke perangkat ditutup.")
-
+        """Melepas bus; port serial ditutup setelah perangkat terakhir di port itu selesai."""
+        if self._shared:
+            self.bus.release()
+            self._shared = False
+            print("Koneksi ke perangkat ditutup.")
@@ -0,0 +1,94 @@
+import threading
+import time
+
+
+class ReportingPolicy:
+    # Alasan yang membuat pembacaan langsung dikirim, tanpa menunggu batch berikutnya
+    URGENT = ('immediate', 'alarm')
+
+    def __init__(self, deadbands, max_silence=60.0, immediate=("gas_detection", "earthquake"),
+                 full_rate_above=None, hold=10.0):
+        """
+        Pelaporan berbasis perubahan: pembacaan hanya dikirim jika ada metrik yang
+        bergeser melewati deadband-nya dari nilai terakhir yang dikirim, atau jika
+        sudah `max_silence` detik tidak ada kiriman (heartbeat). Server menganggap
+        nilai terakhir tetap berlaku sampai ada pembacaan baru.
+
+        Perubahan pada field `immediate` (gas, gempa) selalu dikirim saat itu juga.
+        Selama field tersebut aktif, atau ada nilai di atas batas `full_rate_above`
+        (mis. CO2 tinggi), dan `hold` detik sesudahnya, setiap pembacaan dikirim
+        agar aturan alarm di server (yang menghitung pembacaan berturut-turut)
+        tetap bekerja seperti tanpa deadband.
+
+        :param deadbands: {field: ambang} dengan ambang absolut, atau (absolut, relatif)
+                          yang berarti max(absolut, relatif * |nilai terakhir|)
+        :param max_silence: Detik maksimum tanpa kiriman
+        :param immediate: Field boolean yang dikirim segera setiap kali berubah
+        :param full_rate_above: {field: batas}; di atas batas ini semua pembacaan dikirim
+        :param hold: Detik pelaporan penuh setelah kondisi alarm berakhir
+        """
+        self.deadbands = deadbands
+        self.max_silence = max_silence
+        self.immediate = immediate
+        self.full_rate_above = full_rate_above or {}
+        self.hold = hold
+        self.samples = 0
+        self.suppressed = 0
+        self.sent = {}
+        self._lock = threading.Lock()
+        self._last = None
+        self._last_sent = None
+        self._hold_until = float('-inf')
+
+    def check(self, reading, now=None):
+        """
+        Memutuskan apakah `reading` dikirim. Mengembalikan alasannya ('first',
+        'immediate', 'alarm', 'deadband' atau 'heartbeat'), atau None jika
+        pembacaan cukup diwakili oleh kiriman terakhir.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.samples += 1
+            reason = self._reason(reading, now)
+            if reason is None:
+                self.suppressed += 1
+                return None
+            self.sent[reason] = self.sent.get(reason, 0) + 1
+            self._last = dict(reading)
+            self._last_sent = now
+            return reason
+
+    def _reason(self, reading, now):
+        if self._last is None:
+            return 'first'
+        if any(reading.get(field) != self._last.get(field) for field in self.immediate):
+            self._hold_until = now + self.hold
+            return 'immediate'
+        if any(reading.get(field) for field in self.immediate) or any(
+            self._is_number(reading.get(field)) and reading[field] > limit
+            for field, limit in self.full_rate_above.items()
+        ):
+            self._hold_until = now + self.hold
+        if now < self._hold_until:
+            return 'alarm'
+        if any(self._moved(field, band, reading.get(field)) for field, band in self.deadbands.items()):
+            return 'deadband'
+        if now - self._last_sent >= self.max_silence:
+            return 'heartbeat'
+        return None
+
+    def _moved(self, field, band, value):
+        last = self._last.get(field)
+        if not (self._is_number(value) and self._is_number(last)):
+            # Sensor yang mulai/berhenti gagal (None) juga merupakan perubahan
+            return value != last
+        absolute, relative = band if isinstance(band, tuple) else (band, 0.0)
+        return abs(value - last) >= max(absolute, relative * abs(last))
+
+    @staticmethod
+    def _is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def stats(self):
+        with self._lock:
+            return {"samples": self.samples, "suppressed": self.suppressed, "sent": dict(self.sent)}
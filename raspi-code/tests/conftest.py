@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modul Pi diimpor langsung dari raspi-code; ditaruh di akhir sys.path agar
+# raspi-code/main.py tidak menutupi main.py milik server
+RASPI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RASPI_DIR not in sys.path:
+    sys.path.append(RASPI_DIR)
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import acquisition
+from acquisition import AcquisitionScheduler, SensorPoller, Snapshot, sample_every
+from hardware import SimulatedSensor
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_snapshot_values_go_stale(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(acquisition.time, 'monotonic', clock)
+    snapshot = Snapshot()
+    snapshot.declare(['co2', 'temp'])
+    assert snapshot.sample() == {"co2": None, "temp": None}
+
+    snapshot.update({"co2": 600}, max_age=3.0)
+    snapshot.update({"temp": 27.0})
+    clock.now += 2.0
+    assert snapshot.sample() == {"co2": 600, "temp": 27.0}
+    clock.now += 2.0
+    assert snapshot.sample() == {"co2": None, "temp": 27.0}
+    assert snapshot.age('co2') == 4.0 and snapshot.age('missing') is None
+
+
+def test_failed_read_keeps_previous_value():
+    snapshot = Snapshot()
+    sensor = SimulatedSensor('noise', {"noise": (45.0, 2.0)}, seed=1)
+    poller = SensorPoller(sensor, snapshot)
+    assert poller.poll_once()
+    value = snapshot.sample()["noise"]
+
+    sensor.fail_rate = 1.0
+    assert not poller.poll_once()
+    assert (poller.reads, poller.errors) == (1, 1)
+    assert snapshot.sample()["noise"] == value
+
+
+def test_slow_sensor_does_not_hold_up_the_others():
+    slow = SimulatedSensor('sht20', {"temp": (27.0, 0.1)}, interval=0.2, delay=0.3, seed=1)
+    fast = SimulatedSensor('mhz19', {"co2": (600.0, 10.0)}, interval=0.02, seed=1)
+    samples = []
+    stop = threading.Event()
+    scheduler = AcquisitionScheduler([slow, fast]).start()
+    sampler = threading.Thread(target=sample_every, args=(scheduler.snapshot, 0.05, stop, samples.append))
+    sampler.start()
+    time.sleep(0.5)
+    stop.set()
+    sampler.join()
+    scheduler.stop()
+
+    stats = scheduler.stats()
+    assert stats['mhz19']['reads'] >= 10
+    assert stats['sht20']['reads'] <= 3
+    # Sampel tetap keluar dengan lajunya sendiri, termasuk sebelum sensor lambat selesai
+    assert len(samples) >= 5
+    assert samples[0]["temp"] is None and samples[-1]["temp"] is not None
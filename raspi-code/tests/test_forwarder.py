@@ -0,0 +1,112 @@
+import gzip
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from forwarder import BatchSender, ReadingBuffer, RetryLater
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ''
+
+
+class FakeSession:
+    """Sesi HTTP palsu: `respond(readings)` menentukan respons tiap POST."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.posts = []
+        self.posted = threading.Event()
+
+    def post(self, url, data, headers, timeout):
+        readings = json.loads(gzip.decompress(data))
+        self.posts.append(readings)
+        self.posted.set()
+        return self.respond(readings)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    buffer = ReadingBuffer(str(tmp_path / 'buffer.db'))
+    yield buffer
+    buffer.close()
+
+
+def test_ring_buffer_drops_oldest(tmp_path):
+    path = str(tmp_path / 'ring.db')
+    buffer = ReadingBuffer(path, max_rows=5)
+    for n in range(8):
+        buffer.append({"n": n})
+    assert (buffer.count(), buffer.dropped) == (5, 3)
+    batch = buffer.peek(2)
+    assert [reading["n"] for _, reading in batch] == [3, 4]
+    buffer.ack(batch[-1][0])
+    buffer.close()
+
+    # Isi buffer bertahan setelah proses dimulai ulang
+    buffer = ReadingBuffer(path, max_rows=5)
+    assert [reading["n"] for _, reading in buffer.peek(10)] == [5, 6, 7]
+    buffer.close()
+
+
+def server_rejecting_bad_readings(readings):
+    return FakeResponse(400 if any(reading.get("bad") for reading in readings) else 201)
+
+
+def test_rejected_batch_is_bisected_to_the_invalid_reading(buffer):
+    for n in range(4):
+        buffer.append({"n": n, "bad": n == 2})
+    session = FakeSession(server_rejecting_bad_readings)
+    sender = BatchSender(buffer, 'http://server/api/send/batch', session=session)
+
+    assert sender.send_once() == 2  # [0, 1, 2, 3] ditolak, [0, 1] diterima
+    assert sender.send_once() == 1  # [2, 3] ditolak, [2] ditolak dan dibuang
+    assert sender.send_once() == 1
+    assert sender.send_once() == 0
+    assert [[reading["n"] for reading in post] for post in session.posts] == [
+        [0, 1, 2, 3], [0, 1], [2, 3], [2], [3],
+    ]
+    assert (sender.sent, sender.discarded, buffer.count()) == (3, 1, 0)
+
+
+def test_server_error_keeps_batch_buffered(buffer):
+    buffer.append({"n": 0})
+    session = FakeSession(lambda readings: FakeResponse(503, {'Retry-After': '7'}))
+    sender = BatchSender(buffer, 'http://server/api/send/batch', session=session)
+    with pytest.raises(RetryLater) as error:
+        sender.send_once()
+    assert error.value.retry_after == 7.0
+    assert buffer.count() == 1 and sender.sent == 0
+
+
+def test_flush_interrupts_backoff(buffer):
+    def respond(readings):
+        if len(session.posts) == 1:
+            raise requests.ConnectionError("server mati")
+        return FakeResponse(201)
+
+    session = FakeSession(respond)
+    buffer.append({"n": 1})
+    sender = BatchSender(buffer, 'http://server/api/send/batch', min_backoff=60.0, session=session).start()
+    try:
+        assert session.posted.wait(2)
+        session.posted.clear()
+        sender.flush()
+        # Tanpa flush() pengiriman ulang baru terjadi setelah 30-60 detik
+        assert session.posted.wait(2)
+        deadline = time.monotonic() + 2
+        while buffer.count() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert buffer.count() == 0
+        assert sender.sent == 1 and sender.failures == 1
+    finally:
+        sender.stop()
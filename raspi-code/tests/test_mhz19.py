@@ -0,0 +1,103 @@
+import pytest
+
+import mhz19_backend
+
+from mhz19_backend import (PWM_CYCLE, UART_READ_COMMAND, PWMBackend, SimulatedEdgeSource, UARTBackend,
+                           parse_uart_frame, pwm_ppm, uart_checksum)
+
+
+def test_pwm_formula():
+    # Separuh bagian yang berarti dari siklus HIGH: setengah rentang
+    assert pwm_ppm(0.002 + 0.5, PWM_CYCLE) == pytest.approx(1000)
+    assert pwm_ppm(0.002, PWM_CYCLE) == 0
+    assert pwm_ppm(0.002 + 0.5, PWM_CYCLE, span=5000) == pytest.approx(2500)
+
+
+def test_pwm_backend_averages_cycles():
+    source = SimulatedEdgeSource()
+    backend = PWMBackend(source, cycles=4).start()
+    assert backend.read() is None
+    source.feed(800, cycles=4)
+    assert backend.read() == 800
+    source.feed(1200, cycles=2)
+    assert backend.read() == 1000  # dua siklus 800 dan dua siklus 1200
+    backend.stop()
+
+
+def test_pwm_backend_tolerates_timestamp_jitter():
+    source = SimulatedEdgeSource()
+    backend = PWMBackend(source).start()
+    source.feed(1500, cycles=2, jitter=0.0005)
+    assert backend.read() == pytest.approx(1500, abs=2)
+
+
+def test_pwm_backend_rejects_missed_edges():
+    source = SimulatedEdgeSource()
+    backend = PWMBackend(source).start()
+    source.feed(600, cycles=1)
+    # Satu tepi naik dan satu tepi turun terlewat: periode yang terukur dua kali lipat
+    source.emit(0, source.time + 0.3)
+    source.time += 2 * PWM_CYCLE
+    source.emit(1, source.time)
+    assert backend.rejected == 1
+    source.feed(600, cycles=1)
+    assert backend.read() == 600
+
+
+def test_pwm_backend_goes_stale(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(mhz19_backend.time, 'monotonic', lambda: clock[0])
+    source = SimulatedEdgeSource()
+    backend = PWMBackend(source, max_age=5.0).start()
+    source.feed(900, cycles=2)
+    clock[0] += 4.0
+    assert backend.read() == 900
+    clock[0] += 2.0
+    assert backend.read() is None
+
+
+def uart_frame(ppm):
+    frame = bytearray([0xFF, 0x86, ppm >> 8, ppm & 0xFF, 0x47, 0x00, 0x00, 0x00, 0x00])
+    frame[8] = uart_checksum(frame)
+    return bytes(frame)
+
+
+def test_parse_uart_frame():
+    assert uart_checksum(UART_READ_COMMAND) == UART_READ_COMMAND[8]
+    assert parse_uart_frame(uart_frame(1234)) == 1234
+    corrupted = bytearray(uart_frame(1234))
+    corrupted[3] ^= 0x10
+    with pytest.raises(ValueError, match="Checksum"):
+        parse_uart_frame(corrupted)
+    with pytest.raises(ValueError, match="tidak valid"):
+        parse_uart_frame(uart_frame(1234)[:8])
+
+
+class FakeMHZ19Serial:
+    def __init__(self, ppm):
+        self.ppm = ppm
+        self.requests = []
+        self._pending = b''
+
+    def reset_input_buffer(self):
+        self._pending = b''
+
+    def write(self, data):
+        self.requests.append(bytes(data))
+        self._pending = uart_frame(self.ppm)
+
+    def read(self, size):
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def close(self):
+        pass
+
+
+def test_uart_backend_poll():
+    serial = FakeMHZ19Serial(745)
+    backend = UARTBackend(serial_port=serial)
+    assert backend.read() is None
+    assert backend.poll_once() == 745
+    assert backend.read() == 745
+    assert serial.requests == [UART_READ_COMMAND]
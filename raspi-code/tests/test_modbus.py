@@ -0,0 +1,117 @@
+import struct
+import sys
+import types
+
+import minimalmodbus
+import pytest
+
+from hardware import NoiseSensor
+from modbus_bus import FakeModbusSerial, ModbusBus, ModbusError, crc16, with_crc
+from pzem import PZEM004T, decode_pzem
+
+# Register PZEM-004T: 230,0 V, 1,500 A, 345,0 W, 70000 Wh, 50,0 Hz, PF 0,98, tanpa alarm
+PZEM_REGISTERS = {0: 2300, 1: 1500, 2: 0, 3: 3450, 4: 0, 5: 70000 & 0xFFFF, 6: 70000 >> 16, 7: 500, 8: 98, 9: 0}
+
+
+def test_crc16_matches_modbus_reference():
+    # Request "baca 1 holding register dari alamat 0 di slave 1": CRC 0x0A84, dikirim 84 0A
+    assert crc16(bytes.fromhex('010300000001')) == 0x0A84
+    assert with_crc(bytes.fromhex('010300000001')) == bytes.fromhex('010300000001840a')
+
+
+def test_read_registers_frames_request_and_response():
+    serial = FakeModbusSerial({(1, 4): PZEM_REGISTERS})
+    bus = ModbusBus(serial)
+    assert bus.read_registers(1, 0, 10, functioncode=4) == [PZEM_REGISTERS[i] for i in range(10)]
+    assert serial.requests == [with_crc(struct.pack('>BBHH', 1, 4, 0, 10))]
+    assert (bus.transactions, bus.errors) == (1, 0)
+
+
+def test_slaves_share_one_instrument():
+    serial = FakeModbusSerial({(1, 4): PZEM_REGISTERS, (2, 3): {0: 455}})
+    bus = ModbusBus(serial)
+    assert bus.read_registers(2, 0, 1, functioncode=3) == [455]
+    assert bus.read_registers(1, 7, 2, functioncode=4) == [500, 98]
+    assert [request[0] for request in serial.requests] == [2, 1]
+
+
+def test_exception_response_raises():
+    bus = ModbusBus(FakeModbusSerial({(1, 3): {0: 1}}))
+    with pytest.raises(minimalmodbus.IllegalRequestError):
+        bus.read_registers(1, 5, 1, functioncode=3)
+    assert bus.errors == 1
+
+
+def test_missing_slave_times_out():
+    bus = ModbusBus(FakeModbusSerial({}))
+    with pytest.raises(minimalmodbus.NoResponseError):
+        bus.read_registers(7, 0, 1)
+    assert bus.errors == 1
+
+
+def test_corrupted_response_fails_crc():
+    class NoisySerial(FakeModbusSerial):
+        def read(self, size):
+            data = bytearray(super().read(size))
+            if len(data) > 3:
+                data[0] ^= 0x01  # frame terganggu di jalur
+            return bytes(data)
+
+    bus = ModbusBus(NoisySerial({(1, 3): {0: 1234}}))
+    with pytest.raises(minimalmodbus.InvalidResponseError, match="Checksum"):
+        bus.read_registers(1, 0, 1, functioncode=3)
+
+
+def test_failed_read_is_reported_as_missing_values():
+    assert PZEM004T(bus=ModbusBus(FakeModbusSerial({}))).read_data() == (None, None, None)
+
+
+def test_decode_pzem():
+    assert decode_pzem([PZEM_REGISTERS[i] for i in range(10)]) == {
+        "voltage": 230.0, "current": 1.5, "power": 345.0, "energy_wh": 70000,
+        "frequency": 50.0, "power_factor": 0.98, "alarm": False,
+    }
+
+
+@pytest.fixture
+def shared_port(monkeypatch):
+    """pyserial palsu: setiap port dibuka sebagai FakeModbusSerial yang mencatat close()."""
+    opened = []
+
+    class ClosingSerial(FakeModbusSerial):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    def open_port(port, **kwargs):
+        opened.append(ClosingSerial({(1, 4): PZEM_REGISTERS, (2, 3): {0: 455}}))
+        return opened[-1]
+
+    monkeypatch.setitem(sys.modules, 'serial', types.SimpleNamespace(Serial=open_port))
+    yield opened
+    ModbusBus.close_all()
+
+
+def test_shared_bus_stays_open_until_last_user_closes(shared_port):
+    pzem = PZEM004T(port='/dev/ttyTEST', device_address=1)
+    noise = NoiseSensor(port='/dev/ttyTEST', slave=2, register=0, scale=0.1)
+    assert pzem.bus is noise.bus and len(shared_port) == 1
+
+    pzem.close()
+    assert not shared_port[0].closed
+    assert noise.read() == {"noise": pytest.approx(45.5)}
+    pzem.close()  # menutup dua kali tidak melepas bus milik sensor lain
+    assert not shared_port[0].closed
+
+    noise.close()
+    assert shared_port[0].closed
+    # Pemakai berikutnya mendapat port yang dibuka ulang
+    assert PZEM004T(port='/dev/ttyTEST', device_address=1).read_all()["voltage"] == 230.0
+    assert len(shared_port) == 2
+
+
+def test_bus_passed_in_is_left_to_its_owner():
+    serial = FakeModbusSerial({(1, 4): PZEM_REGISTERS})
+    serial.close = lambda: pytest.fail("bus milik pemanggil ditutup")
+    PZEM004T(bus=ModbusBus(serial)).close()
@@ -0,0 +1,68 @@
+from reporting import ReportingPolicy
+
+
+def reading(**values):
+    base = {"temp": 25.0, "co2": 500, "gas_detection": False, "earthquake": False}
+    base.update(values)
+    return base
+
+
+def test_deadband_suppresses_small_changes():
+    policy = ReportingPolicy({"temp": 0.5}, max_silence=60)
+    assert policy.check(reading(), now=0) == 'first'
+    assert policy.check(reading(temp=25.3), now=1) is None
+    assert policy.check(reading(temp=25.6), now=2) == 'deadband'
+    # Pembanding adalah nilai terakhir yang dikirim, bukan pembacaan sebelumnya
+    assert policy.check(reading(temp=25.9), now=3) is None
+    assert policy.check(reading(temp=26.1), now=4) == 'deadband'
+    assert policy.stats() == {"samples": 5, "suppressed": 2, "sent": {"first": 1, "deadband": 2}}
+
+
+def test_relative_deadband():
+    policy = ReportingPolicy({"co2": (20, 0.1)})
+    policy.check(reading(co2=1000), now=0)
+    # Ambang max(20, 10% dari 1000) = 100 ppm
+    assert policy.check(reading(co2=1090), now=1) is None
+    assert policy.check(reading(co2=1100), now=2) == 'deadband'
+    policy.check(reading(co2=100), now=3)
+    assert policy.check(reading(co2=119), now=4) is None
+    assert policy.check(reading(co2=120), now=5) == 'deadband'
+
+
+def test_heartbeat_after_max_silence():
+    policy = ReportingPolicy({"temp": 0.5}, max_silence=60)
+    policy.check(reading(), now=0)
+    assert policy.check(reading(), now=59) is None
+    assert policy.check(reading(), now=60) == 'heartbeat'
+    assert policy.check(reading(), now=100) is None
+
+
+def test_sensor_failure_counts_as_change():
+    policy = ReportingPolicy({"temp": 0.5})
+    policy.check(reading(), now=0)
+    assert policy.check(reading(temp=None), now=1) == 'deadband'
+    assert policy.check(reading(temp=None), now=2) is None
+    assert policy.check(reading(), now=3) == 'deadband'
+
+
+def test_alarm_fields_are_sent_at_full_rate():
+    policy = ReportingPolicy({"temp": 0.5}, hold=10)
+    policy.check(reading(), now=0)
+    assert policy.check(reading(gas_detection=True), now=1) == 'immediate'
+    # Selama gas aktif setiap pembacaan dikirim
+    assert policy.check(reading(gas_detection=True), now=20) == 'alarm'
+    assert policy.check(reading(), now=30) == 'immediate'
+    # `hold` detik sesudah kondisi berakhir masih dikirim penuh
+    assert policy.check(reading(), now=39) == 'alarm'
+    assert policy.check(reading(), now=40) is None
+
+
+def test_full_rate_above_limit():
+    policy = ReportingPolicy({"co2": 1000}, full_rate_above={"co2": 2000}, hold=5)
+    policy.check(reading(co2=1500), now=0)
+    assert policy.check(reading(co2=1900), now=1) is None
+    assert policy.check(reading(co2=2100), now=2) == 'alarm'
+    assert policy.check(reading(co2=2150), now=3) == 'alarm'
+    assert policy.check(reading(co2=1500), now=4) == 'alarm'
+    assert policy.check(reading(co2=1500), now=8) is None
+    assert policy.check(reading(co2=None), now=9) == 'deadband'
@@ -0,0 +1,82 @@
+"""
+Production entry point.
+
+Runs the app on a gevent (or eventlet) event loop without the debug reloader.
+With --workers N it starts N server processes on ports PORT .. PORT+N-1; put
+them behind a load balancer with sticky sessions (e.g. nginx ip_hash) and set
+SOCKETIO_MESSAGE_QUEUE so Socket.IO emits reach clients of every process.
+
+    DATABASE_URL=postgresql://... SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 \\
+        python serve.py --workers 4
+
+Under gevent a postgresql:// DATABASE_URL is served with psycopg 3 (the
+'psycopg' package), whose queries yield to the event loop; under eventlet
+it keeps psycopg2, which eventlet's monkey-patching makes cooperative. Comfort
+model inference runs on the event loop library's pool of OS threads.
+
+All other settings are read from the environment by main.py.
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import signal
+import sys
+
+
+def pick_async_mode():
+    mode = os.environ.get('SOCKETIO_ASYNC_MODE')
+    if mode:
+        return mode
+    for candidate in ('gevent', 'eventlet'):
+        if importlib.util.find_spec(candidate) is not None:
+            return candidate
+    return 'threading'
+
+
+def run_worker(index, host, port):
+    mode = pick_async_mode()
+    # Patching has to happen before anything imports socket or threading
+    if mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    elif mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    os.environ['SOCKETIO_ASYNC_MODE'] = mode
+
+    import main
+
+    # Database maintenance only needs to run in one process
+    if index == 0:
+        main.socketio.start_background_task(main.partition_maintenance_loop)
+    main.start_model_tasks()
+    main.restore_alerts()
+    print(f"Worker {index} ({mode}) listening on {host}:{port + index}")
+    main.socketio.run(main.app, host=host, port=port + index, debug=False, use_reloader=False,
+                      log_output=False, allow_unsafe_werkzeug=mode == 'threading')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the building monitoring server in production mode.")
+    parser.add_argument('--host', default=os.environ.get('HOST_IP', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', 1)))
+    args = parser.parse_args()
+
+    if args.workers > 1 and not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+        sys.exit("SOCKETIO_MESSAGE_QUEUE must be set to run more than one worker.")
+
+    if args.workers == 1:
+        run_worker(0, args.host, args.port)
+    else:
+        # 'spawn' gives every worker a fresh interpreter to monkey-patch
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=run_worker, args=(i, args.host, args.port)) for i in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        # 'kill -HUP <this pid>' makes every worker re-read the active model version
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda *_: [os.kill(w.pid, signal.SIGHUP) for w in workers if w.is_alive()])
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Never let the tests touch the database configured for the server
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['SOCKETIO_ASYNC_MODE'] = 'threading'
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def server():
+    import main
+    return main
+
+
+@pytest.fixture
+def client(server):
+    """Test client on freshly created tables."""
+    with server.app.app_context():
+        server.db.drop_all()
+        server.db.create_all()
+    return server.app.test_client()
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+READING = dict(humidity=60.0, illuminance=300.0, co2=500, noise=40.0, current=1.5, voltage=220.0,
+               gas_detection=False, earthquake=False)
+T0 = datetime(2026, 10, 1, 12, 0, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def readings(server, client):
+    # pi-01 reports on change: 25 at 12:00:30, 26 at 12:01:10, 27 at 12:04:00 and,
+    # after going silent for longer than CARRY_FORWARD_SECONDS, 28 at 12:15:00
+    rows = [('pi-01', 0, 25.0), ('pi-01', 40, 26.0), ('pi-01', 210, 27.0), ('pi-01', 870, 28.0),
+            ('pi-02', 45, 30.0)]
+    with server.app.app_context():
+        server.ensure_devices(['pi-01', 'pi-02'])
+        sensors = [
+            server.SensorData(**READING, device_id=device, temp=temp, time=T0 + timedelta(seconds=offset))
+            for device, offset, temp in rows
+        ]
+        server.db.session.add_all(sensors)
+        server.db.session.flush()
+        server.update_rollups(sensors)
+        server.db.session.commit()
+    return client
+
+
+def aggregate(client, **params):
+    query = {'from': '2026-10-01T12:01:00+00:00', 'to': '2026-10-01T12:17:00+00:00', 'fields': 'temp', **params}
+    response = client.get('/api/sensor_data/aggregate', query_string=query)
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+
+def test_rollup_buckets_carry_the_last_values_forward(server, readings, monkeypatch):
+    monkeypatch.setattr(server, 'held_readings', None)  # the default never scans raw readings
+    data = aggregate(readings, bucket='1m', device='pi-01')
+    assert [(item['time'][11:16], item['count'], item.get('filled', False)) for item in data] == [
+        ('12:01', 1, False), ('12:02', 0, True), ('12:03', 0, True),
+        ('12:04', 1, False), ('12:05', 0, True), ('12:06', 0, True),
+        ('12:15', 1, False), ('12:16', 0, True),
+    ]
+    assert data[0]['temp'] == {'min': 26.0, 'max': 26.0, 'mean': 26.0, 'last': 26.0}
+    assert data[1]['temp'] == {'min': 26.0, 'max': 26.0, 'mean': 26.0, 'last': 26.0}
+
+
+def test_rollup_buckets_start_from_the_value_held_over(readings):
+    data = aggregate(readings, bucket='1m', device='pi-01',
+                     **{'from': '2026-10-01T12:02:00+00:00', 'to': '2026-10-01T12:04:00+00:00'})
+    assert [(item['time'][11:16], item['count'], item['temp']['last']) for item in data] == [
+        ('12:02', 0, 26.0), ('12:03', 0, 26.0),
+    ]
+    # The device went offline at 12:07, CARRY_FORWARD_SECONDS after its last reading
+    assert aggregate(readings, bucket='1m', device='pi-01', **{'from': '2026-10-01T12:08:00+00:00',
+                                                                 'to': '2026-10-01T12:10:00+00:00'}) == []
+
+
+def test_buckets_start_from_the_value_held_over(readings):
+    data = aggregate(readings, bucket='1m', device='pi-01', source='raw')
+    assert [(item['time'][11:16], item['count'], item.get('filled', False)) for item in data] == [
+        ('12:01', 1, False), ('12:02', 0, True), ('12:03', 0, True),
+        ('12:04', 1, False), ('12:05', 0, True), ('12:06', 0, True),
+        ('12:15', 1, False), ('12:16', 0, True),
+    ]
+    # 25 held for 10 s, then 26 for 50 s
+    assert data[0]['temp'] == {'min': 25.0, 'max': 26.0, 'mean': pytest.approx(25 + 50 / 60), 'last': 26.0}
+    assert data[1]['temp'] == {'min': 26.0, 'max': 26.0, 'mean': 26.0, 'last': 26.0}
+
+
+def test_wide_buckets_are_time_weighted_and_filled(readings):
+    data = aggregate(readings, bucket='15m', device='pi-01', source='raw')
+    assert [(item['time'][11:16], item['count'], item.get('filled', False)) for item in data] == [
+        ('12:00', 2, False), ('12:15', 1, False),
+    ]
+    # 25 for 10 s, 26 for 170 s and 27 for 180 s before the device went offline
+    assert data[0]['temp']['mean'] == pytest.approx((25 * 10 + 26 * 170 + 27 * 180) / 360)
+    assert data[0]['temp']['last'] == 27.0
+
+
+def test_fill_none_gives_per_reading_statistics(readings):
+    data = aggregate(readings, bucket='15m', device='pi-01', fill='none', source='raw')
+    assert data[0]['temp'] == {'min': 26.0, 'max': 27.0, 'mean': 26.5, 'last': 27.0}
+
+
+def test_devices_hold_their_own_values(readings):
+    data = aggregate(readings, bucket='1m', to='2026-10-01T12:03:00+00:00', source='raw')
+    # pi-01 holds 26 and pi-02 holds 30 over the whole bucket
+    assert data[1]['temp'] == {'min': 26.0, 'max': 30.0, 'mean': 28.0, 'last': 30.0}
+
+
+def test_lttb_series_are_steps(readings):
+    data = aggregate(readings, mode='lttb', device='pi-01', to='2026-10-01T12:05:00+00:00')['temp']
+    assert [(time[11:19], value) for time, value in data] == [
+        ('12:01:00', 25.0), ('12:01:10', 25.0), ('12:01:10', 26.0),
+        ('12:04:00', 26.0), ('12:04:00', 27.0), ('12:05:00', 27.0),
+    ]
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+from alerts import AlertEngine, AlertRule
+
+T0 = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def feed(engine, device_id, field, values, start=0):
+    """Evaluates one reading per second from T0 + `start`; returns (index, state) of every transition."""
+    transitions = []
+    for i, value in enumerate(values, start):
+        for alert in engine.evaluate(device_id, {field: value}, T0 + timedelta(seconds=i)):
+            transitions.append((i, alert['state']))
+    return transitions
+
+
+def test_boolean_rule_is_debounced():
+    engine = AlertEngine([AlertRule('gas', 'gas_detection', raise_after=2, clear_after=3)])
+    # A single glitch does not raise; two readings in a row do
+    assert feed(engine, 'pi-01', 'gas_detection', [True, False, True, True, True]) == [(3, 'raised')]
+    # A triggering reading while clearing starts the count again
+    assert feed(engine, 'pi-01', 'gas_detection', [False, False, True, False, False, False], start=5) == [(10, 'cleared')]
+
+
+def test_threshold_rule_has_hysteresis():
+    engine = AlertEngine([AlertRule('co2', 'co2', raise_above=3000, clear_below=2700, raise_after=2, clear_after=2)])
+    assert feed(engine, 'pi-01', 'co2', [3100, 3200, 2800, 2900, 2750]) == [(1, 'raised')]
+    # Values between the thresholds neither count towards clearing nor reset it
+    assert feed(engine, 'pi-01', 'co2', [2600, 2800, 2650], start=5) == [(7, 'cleared')]
+    assert engine.active() == []
+
+
+def test_unknown_values_are_ignored():
+    engine = AlertEngine([AlertRule('gas', 'gas_detection', raise_after=2)])
+    assert feed(engine, 'pi-01', 'gas_detection', [True, None, 'error', True]) == [(3, 'raised')]
+
+
+def test_replayed_readings_do_not_count_twice():
+    engine = AlertEngine([AlertRule('gas', 'gas_detection', raise_after=2)])
+    assert feed(engine, 'pi-01', 'gas_detection', [True]) == []
+    # The same reading resent after a failed upload
+    assert feed(engine, 'pi-01', 'gas_detection', [True]) == []
+    assert feed(engine, 'pi-01', 'gas_detection', [True], start=1) == [(1, 'raised')]
+
+
+def test_devices_are_independent_and_restorable():
+    engine = AlertEngine([AlertRule('earthquake', 'earthquake')])
+    assert feed(engine, 'pi-01', 'earthquake', [True]) == [(0, 'raised')]
+    assert feed(engine, 'pi-02', 'earthquake', [False]) == []
+    engine.restore('pi-03', 'earthquake', T0, True)
+    assert sorted(alert['device_id'] for alert in engine.active()) == ['pi-01', 'pi-03']
+    assert [alert['reading_time'] for alert in engine.active('pi-03')] == [T0.isoformat()]
+    stats = engine.stats()
+    assert (stats['tracked'], stats['active'], stats['evaluated'], stats['transitions']) == (3, 2, 2, 1)
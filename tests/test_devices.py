@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.parametrize('route', ['/api/devices', '/api/sites'])
+@pytest.mark.parametrize('body', [{}, {'data': 'not json'}, {'json': ['pi-01']}])
+def test_registry_rejects_bodies_that_are_not_objects(client, route, body):
+    response = client.post(route, **body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_device_is_registered_on_a_site(client):
+    assert client.post('/api/sites', json={'id': 'lab', 'name': 'Lab'}).status_code == 201
+    response = client.post('/api/devices', json={'id': 'pi-01', 'site_id': 'lab'})
+    assert response.status_code == 201
+    assert response.get_json()['site_id'] == 'lab'
+    assert client.post('/api/devices', json={'id': 'pi-02', 'site_id': 'attic'}).status_code == 400
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from inference import (CURRENT_FILE, MODEL_FEATURES, ComfortModel, MicroBatcher, ModelRegistry, load_forest,
+                       pack_forest, save_forest)
+from training import save_artifacts
+
+
+def fitted_forest(seed=0, rows=400):
+    rng = np.random.default_rng(seed)
+    X = rng.normal([27, 65, 700, 0, 350, 200], [3, 10, 200, 0.3, 100, 80], size=(rows, len(MODEL_FEATURES)))
+    y = ((X[:, 0] > 28) | (X[:, 2] > 900)).astype(int)
+    scaler = StandardScaler().fit(X)
+    # Unlimited depth gives trees of different depths; leaves are reached at different steps
+    model = RandomForestClassifier(n_estimators=15, random_state=seed).fit(scaler.transform(X), y)
+    return model, scaler, rng.normal([27, 65, 700, 0, 350, 200], [4, 12, 250, 0.3, 120, 90], size=(300, 6))
+
+
+def test_packed_forest_matches_sklearn():
+    model, scaler, X = fitted_forest()
+    comfort_model = ComfortModel.from_sklearn(model, scaler, MODEL_FEATURES)
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(comfort_model.predict_proba(X), expected, rtol=0, atol=1e-12)
+    comfortable, _ = comfort_model.predict(X)
+    assert (comfortable == (model.classes_[expected.argmax(axis=1)] == 0)).all()
+
+
+def test_packed_forest_survives_save_and_load(tmp_path):
+    model, scaler, X = fitted_forest(seed=1)
+    forest = pack_forest(model, scaler)
+    save_forest(tmp_path, forest)
+    loaded = ComfortModel(load_forest(tmp_path), MODEL_FEATURES)
+    np.testing.assert_array_equal(loaded.predict_proba(X), ComfortModel(forest, MODEL_FEATURES).predict_proba(X))
+
+
+def test_packed_forest_rejects_what_it_cannot_reproduce():
+    model, scaler, X = fitted_forest()
+    with pytest.raises(ValueError, match="Cannot pack"):
+        pack_forest(model, MinMaxScaler().fit(X))
+    X[0, 2] = np.nan
+    with pytest.raises(ValueError, match="NaN"):
+        ComfortModel.from_sklearn(model, scaler, MODEL_FEATURES).predict_proba(X)
+
+
+class SlowModel:
+    """Takes 50 ms per predict_proba call, however many rows it gets."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def feature_matrix(self, rows):
+        return np.array([[row['x']] for row in rows], dtype=np.float64)
+
+    def predict_proba(self, X):
+        self.calls += 1
+        time.sleep(0.05)
+        return np.column_stack([X[:, 0], 1 - X[:, 0]])
+
+
+def test_micro_batch_splits_inference_time_between_rows():
+    model = SlowModel()
+    batcher = MicroBatcher(lambda: model, max_wait=0.05)
+    results = [None] * 4
+    start = threading.Barrier(4)
+
+    def predict(i):
+        start.wait()
+        results[i] = batcher.predict_one({'x': i / 10})
+    threads = [threading.Thread(target=predict, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.calls == 1
+    for i, (comfort_model, prob, inference_ms) in enumerate(results):
+        assert comfort_model is model
+        assert prob[0] == i / 10
+        assert 50 / 4 <= inference_ms < 100 / 4
+
+
+def test_micro_batch_runs_the_forest_through_run():
+    model = SlowModel()
+    threads = []
+
+    def run(func, *args):
+        threads.append(threading.current_thread().name)
+        return func(*args)
+    batcher = MicroBatcher(lambda: model, run=run)
+    assert batcher.predict_one({'x': 0.5})[1][0] == 0.5
+    assert threads == ['comfort-batcher']
+
+
+@pytest.fixture
+def model_root(tmp_path):
+    """Two model versions trained on different data, as 'flask train-comfort-model' writes them."""
+    for seed, version in enumerate(['v1', 'v2']):
+        model, scaler, _ = fitted_forest(seed=seed)
+        save_artifacts(tmp_path, model, scaler, {'version': version, 'features': MODEL_FEATURES})
+    return tmp_path
+
+
+def test_registry_swaps_versions_without_disturbing_callers(model_root):
+    registry = ModelRegistry(model_root, default_dir=model_root / 'v1')
+    assert registry.loaded() is None  # nothing is loaded before first use
+    before = registry.current()
+    assert before.version == 'v1'
+
+    assert registry.activate('v2').version == 'v2'
+    assert registry.current().version == 'v2'
+    assert (model_root / CURRENT_FILE).read_text() == 'v2'
+    # A request that started on v1 finishes on it
+    X = fitted_forest()[2]
+    assert before.predict_proba(X).shape == (len(X), 2)
+
+
+def test_other_processes_follow_on_refresh(model_root):
+    serving = ModelRegistry(model_root, default_dir=model_root / 'v1')
+    admin = ModelRegistry(model_root, default_dir=model_root / 'v1')
+    assert serving.current().version == 'v1'
+    assert not serving.refresh()
+
+    admin.activate('v2')
+    assert serving.refresh()
+    assert serving.current().version == 'v2'
+    assert not serving.refresh()
+
+
+def test_failed_activation_keeps_the_served_version(model_root):
+    registry = ModelRegistry(model_root, default_dir=model_root / 'v1')
+    registry.current()
+    for version in ['../v1', '.hidden', '']:
+        with pytest.raises(ValueError):
+            registry.activate(version)
+    with pytest.raises(FileNotFoundError):
+        registry.activate('v3')
+    (model_root / 'v2' / 'forest_value.npy').write_bytes(b'broken')
+    with pytest.raises(ValueError):
+        registry.activate('v2')
+
+    assert registry.current().version == 'v1'
+    assert not (model_root / CURRENT_FILE).exists()
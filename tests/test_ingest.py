@@ -0,0 +1,62 @@
+READING = dict(temp=25.0, humidity=60.0, illuminance=300.0, co2=500, noise=40.0, current=1.5, voltage=220.0,
+               gas_detection=False, earthquake=False)
+
+
+def test_refused_reading_is_not_screened(server, client, monkeypatch):
+    reading = dict(READING, device_id='pi-busy', earthquake=True)
+    inspected = server.quality_detector.stats()['inspected']
+    monkeypatch.setattr(server.comfort_pipeline, 'free_slots', lambda: 0)
+
+    assert client.post('/api/send', json=reading).status_code == 503
+    assert client.post('/api/send/batch', json=[reading, reading]).status_code == 503
+    assert server.quality_detector.stats()['inspected'] == inspected
+    assert server.alert_engine.active('pi-busy') == []
+
+    monkeypatch.undo()
+    assert client.post('/api/send', json=reading).status_code == 201
+    assert server.quality_detector.stats()['inspected'] == inspected + 1
+    assert [alert['rule'] for alert in server.alert_engine.active('pi-busy')] == ['earthquake']
+
+
+def stored_count(server):
+    with server.app.app_context():
+        return server.db.session.execute(server.db.select(server.db.func.count()).select_from(server.SensorData)).scalar()
+
+
+def test_resent_batch_is_stored_once(server, client):
+    batch = [dict(READING, device_id='pi-01', temp=25.0 + i, time=f'2026-10-01T12:00:0{i}+00:00') for i in range(3)]
+    assert client.post('/api/send/batch', json=batch).get_json()['duplicates'] == 0
+    # The response was lost; the device sends the batch again with one new reading
+    batch.append(dict(READING, device_id='pi-01', time='2026-10-01T14:00:03+02:00'))
+    response = client.post('/api/send/batch', json=batch)
+    assert response.status_code == 201
+    assert response.get_json()['duplicates'] == 3
+    assert stored_count(server) == 4
+
+
+def test_batch_readings_without_time_are_all_stored(server, client):
+    response = client.post('/api/send/batch', json=[dict(READING, device_id='pi-01')] * 3)
+    assert response.get_json()['duplicates'] == 0
+    assert stored_count(server) == 3
+
+
+def test_batch_alerts_before_the_database(server, client, monkeypatch):
+    active_at_dedupe = []
+    stored_reading_keys = server.stored_reading_keys
+
+    def record(rows):
+        active_at_dedupe.extend(alert['rule'] for alert in server.alert_engine.active('pi-quake'))
+        return stored_reading_keys(rows)
+    monkeypatch.setattr(server, 'stored_reading_keys', record)
+
+    batch = [dict(READING, device_id='pi-quake', earthquake=True, time='2026-10-01T12:00:00+00:00')]
+    assert client.post('/api/send/batch', json=batch).status_code == 201
+    assert active_at_dedupe == ['earthquake']
+
+
+def test_resent_batch_is_screened_once(server, client):
+    batch = [dict(READING, device_id='pi-screen', time=f'2026-10-01T12:00:0{i}+00:00') for i in range(3)]
+    client.post('/api/send/batch', json=batch)
+    state = server.quality_detector.state('pi-screen')['pi-screen']['temp']
+    client.post('/api/send/batch', json=batch)
+    assert server.quality_detector.state('pi-screen')['pi-screen']['temp'] == state
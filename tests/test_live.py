@@ -0,0 +1,115 @@
+import pytest
+
+import live
+from live import DeltaEncoder, EmitCoalescer
+
+msgpack = pytest.importorskip('msgpack')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(live.time, 'monotonic', clock)
+    return clock
+
+
+def unpack(frame):
+    return msgpack.unpackb(frame, strict_map_key=False)
+
+
+def encoder(**kwargs):
+    return DeltaEncoder(['sensor_update'], ['id', 'device_id', 'temp', 'humidity'], msgpack.packb, **kwargs)
+
+
+def test_deltas_carry_only_changed_fields(clock):
+    compact = encoder()
+    first = unpack(compact.encode('sensor_update', None, {'id': 1, 'device_id': 'pi-01', 'temp': 21.0, 'humidity': 50}))
+    assert first == [0, True, None, 'pi-01', {0: 1, 1: 'pi-01', 2: 21.0, 3: 50}]
+    second = unpack(compact.encode('sensor_update', None, {'id': 2, 'device_id': 'pi-01', 'temp': 21.0, 'humidity': 51}))
+    # The base is the id of the frame the delta applies to
+    assert second == [0, False, 1, 'pi-01', {0: 2, 3: 51}]
+
+
+def test_streams_are_separate_per_device_and_room(clock):
+    compact = encoder()
+    compact.encode('sensor_update', None, {'id': 1, 'device_id': 'pi-01', 'temp': 21.0})
+    assert unpack(compact.encode('sensor_update', None, {'id': 2, 'device_id': 'pi-02', 'temp': 21.0}))[1] is True
+    assert unpack(compact.encode('sensor_update', 'site-a', {'id': 3, 'device_id': 'pi-01', 'temp': 21.0}))[1] is True
+    assert compact.stats()['streams'] == 3
+
+
+def test_keyframes_are_sent_periodically(clock):
+    compact = encoder(keyframe_every=3, keyframe_seconds=10)
+    flags = []
+    for row_id in range(1, 8):
+        flags.append(unpack(compact.encode('sensor_update', None, {'id': row_id, 'device_id': 'pi-01', 'temp': 21.0}))[1])
+    assert flags == [True, False, False, True, False, False, True]
+    clock.now += 10
+    assert unpack(compact.encode('sensor_update', None, {'id': 8, 'device_id': 'pi-01', 'temp': 21.0}))[1] is True
+
+
+def test_requested_keyframe_does_not_reset_the_stream(clock):
+    compact = encoder()
+    compact.encode('sensor_update', None, {'id': 1, 'device_id': 'pi-01', 'temp': 21.0})
+    row = {'id': 2, 'device_id': 'pi-01', 'temp': 22.0}
+    assert unpack(compact.keyframe('sensor_update', 'pi-01', row)) == [0, True, None, 'pi-01', {0: 2, 1: 'pi-01', 2: 22.0}]
+    # Other clients of the stream still hold row 1
+    assert unpack(compact.encode('sensor_update', None, row))[:3] == [0, False, 1]
+    stats = compact.stats()
+    assert (stats['frames'], stats['keyframes']) == (3, 2)
+
+
+class Emits:
+    def __init__(self):
+        self.sent = []
+        self.tasks = []
+
+    def emit(self, event, payload, room):
+        self.sent.append((event, payload, room))
+
+    def start(self, func, *args):
+        self.tasks.append((func, args))
+
+    def run_tasks(self):
+        tasks, self.tasks = self.tasks, []
+        for func, args in tasks:
+            func(*args)
+
+
+def test_burst_collapses_into_the_newest_payload(clock):
+    emits = Emits()
+    emitter = EmitCoalescer(emits.emit, emits.start, lambda seconds: None, max_per_second=5)
+    emitter.publish('sensor_update', 1, source='pi-01')
+    emitter.publish('sensor_update', 2, source='pi-01')
+    emitter.publish('sensor_update', 3, source='pi-01')
+    # Another device in the same room has its own pending payload
+    emitter.publish('sensor_update', 'a', source='pi-02')
+    assert emits.sent == [('sensor_update', 1, None), ('sensor_update', 'a', None)]
+    assert len(emits.tasks) == 1
+    clock.now += 0.2
+    emits.run_tasks()
+    assert emits.sent[-1] == ('sensor_update', 3, None)
+    assert (emitter.emitted, emitter.coalesced) == (3, 1)
+
+
+def test_lost_flush_is_taken_over(clock):
+    emits = Emits()
+    emitter = EmitCoalescer(emits.emit, emits.start, lambda seconds: None, max_per_second=5, stall_after=2.0)
+    emitter.publish('sensor_update', 1)
+    emitter.publish('sensor_update', 2)
+    # The deferred emit never runs
+    clock.now += 3
+    emitter.publish('sensor_update', 3)
+    assert [payload for _, payload, _ in emits.sent] == [1, 3]
+    assert emitter.stalled == 1
+    # The late task finds nothing left to send
+    emits.run_tasks()
+    assert len(emits.sent) == 2
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+READING = dict(temp=25.0, humidity=60.0, illuminance=300.0, co2=500, noise=40.0,
+               current=1.5, voltage=220.0, gas_detection=False, earthquake=False)
+
+
+def insert_readings(server, count, time=None):
+    # A device has one reading per timestamp, so rows sharing one come from different devices
+    devices = [f'pi-{i:02d}' for i in range(count)]
+    with server.app.app_context():
+        server.ensure_devices(devices)
+        rows = [server.SensorData(**READING, device_id=device, time=time) if time
+                else server.SensorData(**READING, device_id=device)
+                for device in devices]
+        server.db.session.add_all(rows)
+        server.db.session.commit()
+        return [row.id for row in rows]
+
+
+def page_through(client, **params):
+    ids = []
+    cursor = None
+    while True:
+        query = dict(params, limit=2, **({'cursor': cursor} if cursor else {}))
+        page = client.get('/api/sensor_data', query_string=query).get_json()
+        ids.extend(row['id'] for row in page['data'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_pages_through_rows_sharing_one_timestamp(server, client):
+    ids = insert_readings(server, 5, time=datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc))
+    assert page_through(client) == ids
+    assert page_through(client, order='desc') == ids[::-1]
+
+
+def test_pages_through_rows_with_default_times(server, client):
+    ids = insert_readings(server, 5)
+    assert page_through(client) == ids
+    assert page_through(client, order='desc') == ids[::-1]
+
+
+def test_time_window_includes_rows_with_default_times(server, client):
+    before = datetime.now(timezone.utc).replace(microsecond=0)
+    ids = insert_readings(server, 3)
+    assert page_through(client, **{'from': before.isoformat()}) == ids
+    assert page_through(client, to=before.isoformat()) == []
+
+
+def test_overview_is_bounded(server, client):
+    ids = insert_readings(server, 5)
+    data = client.get('/api/', query_string={'limit': 3}).get_json()
+    assert [row['id'] for row in data['sensor_data']] == ids[::-1][:3]
+    assert data['more']['sensor_data'] == '/api/sensor_data'
+    assert client.get('/api/', query_string={'limit': 'all'}).status_code == 400
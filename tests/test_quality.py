@@ -0,0 +1,81 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from quality import AnomalyDetector, MetricLimits
+
+T0 = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def detector(stuck_after=None, **kwargs):
+    return AnomalyDetector({'temp': MetricLimits(-40, 85, spike_floor=2.0, stuck_after=stuck_after)}, **kwargs)
+
+
+def kinds(issues):
+    return [issue['kind'] for issue in issues]
+
+
+@pytest.mark.parametrize('value, kind', [
+    ('error', 'invalid'),
+    (True, 'invalid'),
+    (float('nan'), 'invalid'),
+    (120.0, 'out_of_range'),
+    (-50, 'out_of_range'),
+])
+def test_implausible_values_are_quarantined(value, kind):
+    quality = detector()
+    assert kinds(quality.inspect('pi-01', {'temp': value})) == [kind]
+    assert quality.state('pi-01')['pi-01']['temp']['count'] == 0
+    assert quality.stats()['quarantined'] == 1
+
+
+def test_ewma_tracks_mean_and_variance():
+    quality = detector(alpha=0.5)
+    for value in (20.0, 22.0, 20.0):
+        assert quality.inspect('pi-01', {'temp': value}) == []
+    # mean: 20 -> 21 -> 20.5; var: 0 -> 1 -> 0.5 * (1 + 0.5 * 1)
+    state = quality.state('pi-01')['pi-01']['temp']
+    assert state['mean'] == pytest.approx(20.5)
+    assert state['std'] == pytest.approx(math.sqrt(0.75))
+    assert (state['count'], state['last'], state['repeats']) == (3, 20.0, 1)
+
+
+def test_spike_is_flagged_after_warmup():
+    quality = detector(warmup=10)
+    values = [20.0 + 0.1 * (i % 3) for i in range(12)]
+    # Before warmup even a large jump is not a spike
+    assert quality.inspect('pi-01', {'temp': 60.0}) == []
+    for value in values:
+        quality.inspect('pi-02', {'temp': value})
+    assert kinds(quality.inspect('pi-02', {'temp': 60.0})) == ['spike']
+    # A jump below the spike floor is ordinary noise even with a tiny variance
+    for _ in range(12):
+        quality.inspect('pi-03', {'temp': 20.0})
+    assert quality.inspect('pi-03', {'temp': 21.5}) == []
+
+
+def test_frozen_sensor_is_flagged_as_stuck():
+    quality = detector(stuck_after=3)
+    assert [kinds(quality.inspect('pi-01', {'temp': 21.0})) for _ in range(4)] == [[], [], ['stuck'], ['stuck']]
+    assert quality.inspect('pi-01', {'temp': 21.5}) == []
+    assert quality.state('pi-01')['pi-01']['temp']['flags'] == {'stuck': 2}
+
+
+def test_replayed_readings_only_get_range_checks():
+    quality = detector(stuck_after=2)
+    assert quality.inspect('pi-01', {'temp': 21.0}, T0) == []
+    before = quality.state('pi-01')
+    # The same reading resent does not count as a repeat, and is still range checked
+    assert quality.inspect('pi-01', {'temp': 21.0}, T0) == []
+    assert kinds(quality.inspect('pi-01', {'temp': 99.0}, T0 - timedelta(seconds=5))) == ['out_of_range']
+    assert quality.state('pi-01')['pi-01']['temp']['count'] == before['pi-01']['temp']['count']
+    assert kinds(quality.inspect('pi-01', {'temp': 21.0}, T0 + timedelta(seconds=1))) == ['stuck']
+
+
+def test_devices_are_tracked_separately():
+    quality = detector()
+    quality.inspect('pi-01', {'temp': 20.0, 'humidity': 50})
+    quality.inspect('pi-02', {'temp': 'error'})
+    assert set(quality.state()) == {'pi-01', 'pi-02'}
+    assert quality.stats() == {"tracked": 2, "inspected": 2, "flagged": 1, "quarantined": 1}
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+READING = dict(humidity=60.0, illuminance=300.0, co2=500, noise=40.0, current=2.0, voltage=220.0,
+               gas_detection=False, earthquake=False)
+T0 = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def ingest(server, readings):
+    """Stores (seconds after T0, temp) readings of pi-01 in one transaction, as the ingest routes do."""
+    with server.app.app_context():
+        server.ensure_devices(['pi-01'])
+        sensors = [server.SensorData(**READING, device_id='pi-01', temp=temp, time=T0 + timedelta(seconds=offset))
+                   for offset, temp in readings]
+        server.db.session.add_all(sensors)
+        server.db.session.flush()
+        server.update_rollups(sensors)
+        server.db.session.commit()
+
+
+def rollup_rows(server, rollup):
+    with server.app.app_context():
+        return [{column.name: getattr(row, column.name) for column in rollup.__table__.columns}
+                for row in server.db.session.scalars(server.db.select(rollup).order_by(rollup.bucket))]
+
+
+def test_upserts_merge_into_existing_buckets(server, client):
+    ingest(server, [(10, 20.0), (40, 22.0)])
+    # A late batch with an older reading and a failed temperature read
+    ingest(server, [(20, 30.0), (30, None)])
+
+    [row] = rollup_rows(server, server.SensorRollupMinute)
+    assert (row['count'], row['temp_count'], row['temp_sum'], row['temp_min'], row['temp_max']) == (4, 3, 72.0, 20.0, 30.0)
+    # 'last' follows the reading time, not the arrival order
+    assert row['temp_last'] == 22.0
+    assert row['last_time'].replace(tzinfo=timezone.utc) == T0 + timedelta(seconds=40)
+    assert row['energy_sum'] == 4 * 440.0
+
+    ingest(server, [(55, None)])
+    [row] = rollup_rows(server, server.SensorRollupMinute)
+    assert (row['count'], row['temp_count'], row['temp_last']) == (5, 3, None)
+
+
+def test_incremental_rollups_match_a_backfill(server, client):
+    ingest(server, [(0, 20.0), (70, 21.5), (3590, 19.0)])
+    ingest(server, [(30, 25.0), (3600, 18.0), (65, None)])
+    ingest(server, [(7200, 17.5)])
+    incremental = {rollup: rollup_rows(server, rollup) for rollup in server.ROLLUP_MODELS}
+
+    with server.app.app_context():
+        for rollup in server.ROLLUP_MODELS:
+            server.backfill_rollup(rollup, T0, T0 + timedelta(hours=3))
+        server.db.session.commit()
+    for rollup, rows in incremental.items():
+        assert rollup_rows(server, rollup) == rows
+    assert len(incremental[server.SensorRollupMinute]) == 5
+    assert len(incremental[server.SensorRollupHour]) == 3
@@ -0,0 +1,175 @@
+"""
+Offline training and evaluation of the comfort model.
+
+Feature rows are streamed out of sensor_data in chunks and mapped with the same
+`comfort_features()` used at ingest. Labels come from a CSV of comfort
+observations (e.g. occupant votes): each reading takes the most recent label of
+its device within `window` seconds. Run it with `flask train-comfort-model`;
+nothing here is imported by the web server.
+"""
+import csv
+import json
+import os
+import platform
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, confusion_matrix, precision_recall_fscore_support, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from inference import (COMFORT_CLASS, METADATA_FILE, MODEL_FEATURES, MODEL_FILE, SCALER_FILE, ComfortModel,
+                       comfort_features, feature_matrix, pack_forest, save_forest)
+
+# sensor_data columns read for training, in the order rows are unpacked
+READING_COLUMNS = ['time', 'device_id', 'temp', 'humidity', 'co2', 'gas_detection', 'illuminance', 'current', 'voltage']
+
+# Label values accepted in the CSV; anything else is rejected
+COMFORT_LABELS = {'1': True, 'nyaman': True, 'true': True, '0': False, 'tidak nyaman': False, 'false': False}
+
+
+def epoch_seconds(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def read_labels(path):
+    """
+    Reads a label CSV with columns `time` (ISO 8601), `comfortable` (1/0 or
+    nyaman/tidak nyaman) and optionally `device_id`. Returns
+    {device_id or None: (sorted epoch times, class labels)}; labels without a
+    device apply to every device.
+    """
+    grouped = {}
+    with open(path, newline='') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            value = str(row.get('comfortable', '')).strip().lower()
+            if value not in COMFORT_LABELS:
+                raise ValueError(f"{path}:{line}: invalid 'comfortable' value {row.get('comfortable')!r}")
+            label = COMFORT_CLASS if COMFORT_LABELS[value] else 1 - COMFORT_CLASS
+            device = (row.get('device_id') or '').strip() or None
+            grouped.setdefault(device, []).append((epoch_seconds(datetime.fromisoformat(row['time'])), label))
+
+    labels = {}
+    for device, entries in grouped.items():
+        entries.sort()
+        labels[device] = (np.array([t for t, _ in entries]), np.array([label for _, label in entries]))
+    return labels
+
+
+def label_readings(labels, times, devices, window):
+    """Label per reading (the device's latest label at most `window` seconds old), -1 where there is none."""
+    result = np.full(len(times), -1)
+    for device in set(devices):
+        mask = np.array([d == device for d in devices])
+        for key in (device, None):
+            if key not in labels:
+                continue
+            label_times, label_values = labels[key]
+            index = np.searchsorted(label_times, times[mask], side='right') - 1
+            found = (index >= 0) & (times[mask] - label_times[np.maximum(index, 0)] <= window)
+            current = result[mask]
+            # A device's own labels take precedence over fleet-wide ones
+            fill = found & (current == -1)
+            current[fill] = label_values[index[fill]]
+            result[mask] = current
+    return result
+
+
+def build_dataset(chunks, labels, window):
+    """
+    Turns chunks of READING_COLUMNS rows into (X, y, times), keeping only labelled
+    readings with every feature present. Only the kept rows are held in memory.
+    """
+    parts_X, parts_y, parts_t = [], [], []
+    for rows in chunks:
+        usable = [row for row in rows if all(row[i] is not None for i in range(2, len(READING_COLUMNS)))]
+        if not usable:
+            continue
+        times = np.array([epoch_seconds(row[0]) for row in usable])
+        y = label_readings(labels, times, [row[1] for row in usable], window)
+        keep = y >= 0
+        if not keep.any():
+            continue
+        readings = [dict(zip(READING_COLUMNS, row)) for row, kept in zip(usable, keep) if kept]
+        parts_X.append(feature_matrix([comfort_features(reading) for reading in readings]))
+        parts_y.append(y[keep])
+        parts_t.append(times[keep])
+
+    if not parts_X:
+        return np.empty((0, len(MODEL_FEATURES))), np.empty(0, dtype=int), np.empty(0)
+    return np.concatenate(parts_X), np.concatenate(parts_y), np.concatenate(parts_t)
+
+
+def evaluate(comfort_model, X, y):
+    """Holdout metrics of a ComfortModel, with 'comfort' (COMFORT_CLASS) as the positive class."""
+    probs = comfort_model.predict_proba(X)
+    predicted = comfort_model.classes[probs.argmax(axis=1)]
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y, predicted, labels=[COMFORT_CLASS], zero_division=0
+    )
+    metrics = {
+        "rows": int(len(y)),
+        "accuracy": float(accuracy_score(y, predicted)),
+        "comfort_precision": float(precision[0]),
+        "comfort_recall": float(recall[0]),
+        "comfort_f1": float(f1[0]),
+        "confusion_matrix": confusion_matrix(y, predicted, labels=[0, 1]).tolist(),
+    }
+    if len(set(y)) == 2:
+        metrics["comfort_roc_auc"] = float(roc_auc_score(y == COMFORT_CLASS, probs[:, comfort_model.comfort_index]))
+    return metrics
+
+
+def train(X, y, times, holdout=0.2, n_estimators=100, n_jobs=-1, random_state=42, baseline=None):
+    """
+    Fits the scaler and forest on the older (1 - holdout) share of the readings
+    and evaluates on the newest share, so the metrics reflect data the model
+    has not seen, scored through the same packed ComfortModel the server runs.
+    `baseline` is an optional ComfortModel, e.g. the one being served, scored
+    on the same holdout for comparison.
+    Returns (model, scaler, metrics, split_time).
+    """
+    order = np.argsort(times, kind='stable')
+    X, y, times = X[order], y[order], times[order]
+    split = int(len(y) * (1 - holdout))
+    if split == 0 or len(set(y[:split])) < 2:
+        raise ValueError("Training data needs labelled readings of both classes")
+
+    scaler = StandardScaler().fit(X[:split])
+    model = RandomForestClassifier(n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state)
+    model.fit(scaler.transform(X[:split]), y[:split])
+
+    metrics = {"train_rows": int(split), "holdout_rows": int(len(y) - split)}
+    if split < len(y):
+        metrics["holdout"] = evaluate(ComfortModel.from_sklearn(model, scaler, MODEL_FEATURES), X[split:], y[split:])
+        if baseline is not None:
+            metrics["baseline_holdout"] = evaluate(baseline, X[split:], y[split:])
+    split_time = float(times[split]) if split < len(y) else None
+    return model, scaler, metrics, split_time
+
+
+def save_artifacts(root, model, scaler, metadata):
+    """
+    Writes model.joblib, scaler.joblib, the packed forest arrays and
+    metadata.json to a new `root/<version>` directory and returns its path.
+    The server memory-maps the packed arrays and never unpickles the joblib
+    files, which are kept (uncompressed) for analysis and re-packing.
+    """
+    version = metadata['version']
+    directory = os.path.join(root, version)
+    os.makedirs(directory)
+    joblib.dump(model, os.path.join(directory, MODEL_FILE))
+    joblib.dump(scaler, os.path.join(directory, SCALER_FILE))
+    save_forest(directory, pack_forest(model, scaler))
+    metadata = dict(metadata, sklearn_version=sklearn.__version__, python_version=platform.python_version())
+    with open(os.path.join(directory, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return directory
+
+
+def new_version():
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')